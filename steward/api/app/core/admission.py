@@ -0,0 +1,208 @@
+"""
+Admission control for database-backed requests.
+
+Each worker runs at most ADMISSION_MAX_CONCURRENT such requests at once (by
+default the DB pool's size plus overflow, or 32 without a pool), so a traffic
+spike waits here instead of opening a connection per request and swamping the
+database. Waiting requests are served by priority, then arrival:
+
+    high    checkout, checkin, picking up a reservation
+    normal  everything not listed
+    low     list, history, report and export endpoints
+
+A request that waits longer than its priority's ADMISSION_MAX_WAIT_MS_* is
+shed with 503 and Retry-After, as is one arriving to a full queue
+(ADMISSION_QUEUE_SIZE), unless it outranks someone already waiting; the
+newest lowest-priority waiter is shed in its place. Health, metrics, the
+activity stream (which only reads a backlog before idling) and static files
+skip the limiter. Counters are per worker, under "admission" in /metrics.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import re
+from collections import Counter
+from typing import List, Optional, Tuple
+from starlette.responses import JSONResponse
+from app.core.db import DATABASE_POOL_SIZE, DATABASE_POOL_OVERFLOW
+
+logger = logging.getLogger(__name__)
+
+HIGH, NORMAL, LOW = 0, 1, 2
+PRIORITY_NAMES = {HIGH: "high", NORMAL: "normal", LOW: "low"}
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() != "false"
+ADMISSION_MAX_CONCURRENT = int(os.getenv(
+    "ADMISSION_MAX_CONCURRENT", str(DATABASE_POOL_SIZE + DATABASE_POOL_OVERFLOW if DATABASE_POOL_SIZE > 0 else 32)
+))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "256"))
+ADMISSION_MAX_WAIT_MS = {
+    HIGH: float(os.getenv("ADMISSION_MAX_WAIT_MS_HIGH", "10000")),
+    NORMAL: float(os.getenv("ADMISSION_MAX_WAIT_MS_NORMAL", "3000")),
+    LOW: float(os.getenv("ADMISSION_MAX_WAIT_MS_LOW", "1000")),
+}
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+
+EXEMPT_PATHS = {"/health", "/ready", "/metrics", "/activity/stream", "/docs", "/redoc", "/openapi.json"}
+EXEMPT_PREFIXES = ("/media/", "/profiles", "/docs/")
+
+# First match wins; anything else is NORMAL.
+ROUTE_PRIORITIES: List[Tuple[str, re.Pattern, int]] = [
+    ("POST", re.compile(r"^/assignments/(checkout|checkin/\d+)$"), HIGH),
+    ("POST", re.compile(r"^/reservations/\d+/convert$"), HIGH),
+    ("GET", re.compile(r"^/(export|reports)(/.*)?$"), LOW),
+    ("GET", re.compile(r"^/(assets|activity|incidents|reservations|reservations/availability)$"), LOW),
+    ("GET", re.compile(r"^/assignments/(active|history(/\d+)?|tags)$"), LOW),
+    ("GET", re.compile(r"^/assets/changes$"), LOW),
+]
+
+
+def route_priority(method: str, path: str) -> Optional[int]:
+    """The request's priority, or None if it skips admission control."""
+    if path in EXEMPT_PATHS or path.startswith(EXEMPT_PREFIXES) or method == "OPTIONS":
+        return None
+    for rule_method, pattern, priority in ROUTE_PRIORITIES:
+        if method == rule_method and pattern.match(path):
+            return priority
+    return NORMAL
+
+
+class Shed(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionController:
+    def __init__(self, limit: int = ADMISSION_MAX_CONCURRENT, queue_size: int = ADMISSION_QUEUE_SIZE,
+                 max_wait_ms: Optional[dict] = None):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.max_wait_ms = max_wait_ms or ADMISSION_MAX_WAIT_MS
+        self.active = 0
+        # (priority, seq, future); futures resolve True when handed a slot, False when evicted.
+        # Timed-out and cancelled entries stay in the heap until popped, so count waiters separately.
+        self._heap: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self.queued: Counter = Counter()
+        self.max_queued = 0
+        self.admitted: Counter = Counter()
+        self.shed: Counter = Counter()  # by reason
+        self.shed_by_priority: Counter = Counter()
+        self.wait_ms_total = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return sum(self.queued.values())
+
+    def _shed(self, priority: int, reason: str) -> Shed:
+        self.shed[reason] += 1
+        self.shed_by_priority[PRIORITY_NAMES[priority]] += 1
+        return Shed(reason)
+
+    def _evict_for(self, priority: int) -> bool:
+        """Sheds the newest waiter of the lowest priority below ``priority``, if any."""
+        live = [entry for entry in self._heap if not entry[2].done()]
+        if not live:
+            return False
+        victim = max(live, key=lambda entry: (entry[0], entry[1]))
+        if victim[0] <= priority:
+            return False
+        self.queued[victim[0]] -= 1
+        victim[2].set_result(False)
+        return True
+
+    async def acquire(self, priority: int):
+        """Waits for a slot; raises Shed if the request should be turned away instead."""
+        if self.active < self.limit and not self.waiting:
+            self.active += 1
+            self.admitted[PRIORITY_NAMES[priority]] += 1
+            return
+        if self.waiting >= self.queue_size and not self._evict_for(priority):
+            raise self._shed(priority, "queue_full")
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._heap, (priority, next(self._seq), future))
+        self.queued[priority] += 1
+        self.max_queued = max(self.max_queued, self.waiting)
+        started = loop.time()
+        try:
+            await asyncio.wait({future}, timeout=self.max_wait_ms[priority] / 1000)
+        except asyncio.CancelledError:
+            # Client went away while queued; give back a slot that was handed over meanwhile.
+            if future.done():
+                if future.result():
+                    self.release()
+            else:
+                self.queued[priority] -= 1
+                future.cancel()
+            raise
+
+        if not future.done():
+            self.queued[priority] -= 1
+            future.cancel()
+            raise self._shed(priority, "timeout")
+        if not future.result():
+            raise self._shed(priority, "evicted")
+        self.admitted[PRIORITY_NAMES[priority]] += 1
+        self.wait_ms_total += (loop.time() - started) * 1000
+
+    def release(self):
+        """Hands the slot to the best waiter, or frees it."""
+        while self._heap:
+            priority, _, future = heapq.heappop(self._heap)
+            if future.done():
+                continue
+            self.queued[priority] -= 1
+            future.set_result(True)
+            return
+        self.active -= 1
+
+    def stats(self) -> dict:
+        admitted = sum(self.admitted.values())
+        return {
+            "enabled": ADMISSION_ENABLED,
+            "limit": self.limit,
+            "active": self.active,
+            "queued": {PRIORITY_NAMES[p]: self.queued[p] for p in PRIORITY_NAMES},
+            "max_queued": self.max_queued,
+            "admitted": dict(self.admitted),
+            "shed": dict(self.shed),
+            "shed_by_priority": dict(self.shed_by_priority),
+            "avg_wait_ms": round(self.wait_ms_total / admitted, 3) if admitted else 0.0,
+        }
+
+
+admission = AdmissionController()
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController = admission):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        priority = route_priority(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if not ADMISSION_ENABLED or priority is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(priority)
+        except Shed as e:
+            logger.warning("Shed %s %s (%s priority, %s)", scope["method"], scope["path"], PRIORITY_NAMES[priority], e.reason)
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "The server is busy; please retry shortly."},
+                headers={"Retry-After": str(ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            # Held until the response is fully sent, so streamed exports keep their slot.
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
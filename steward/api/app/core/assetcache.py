@@ -0,0 +1,43 @@
+"""
+Per-worker cache of QR code lookups, keyed by (org_id, qr_code).
+
+Entries are dropped when a commit creates, changes or deletes the asset
+(including status changes made by checkout/checkin/incidents), covering both
+the old and new code when a QR code is reassigned. Other workers only see the
+change once their entry's TTL runs out, which bounds staleness across processes.
+"""
+import itertools
+import os
+from sqlalchemy import event, inspect
+from app.core.cache import LRUCache
+from app.core.db import SessionLocal
+from app.models.asset import Asset
+
+qr_cache = LRUCache(
+    maxsize=int(os.getenv("QR_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("QR_CACHE_TTL_SECONDS", "30")),
+)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_qr_keys(session, flush_context):
+    keys = session.info.setdefault("qr_cache_keys", set())
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        if not isinstance(obj, Asset):
+            continue
+        if obj.qr_code:
+            keys.add((obj.org_id, obj.qr_code))
+        for previous in inspect(obj).attrs.qr_code.history.deleted or ():
+            if previous:
+                keys.add((obj.org_id, previous))
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_qr_keys(session):
+    for key in session.info.pop("qr_cache_keys", ()):
+        qr_cache.delete(key)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_qr_keys(session):
+    session.info.pop("qr_cache_keys", None)
@@ -1,11 +1,22 @@
 import os
+import time
+import logging
+import asyncio
+import threading
 import httpx
+from contextvars import ContextVar
 from enum import Enum
-from typing import Optional, Dict
+from typing import Optional, Dict, Set
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
 
 CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
 
+# Set by POST /batch so its sub-requests share one plan lookup per org.
+plan_memo: ContextVar[Optional[Dict[str, "PlanType"]]] = ContextVar("plan_memo", default=None)
+
 class PlanType(str, Enum):
     STARTER = "starter"
     PRO = "pro"
@@ -33,6 +44,14 @@ class PlanLimits:
             self.has_advanced_reporting = False
 
 async def get_org_plan(org_id: str) -> PlanType:
+    memo = plan_memo.get()
+    if memo is None:
+        return await _fetch_org_plan(org_id)
+    if org_id not in memo:
+        memo[org_id] = await _fetch_org_plan(org_id)
+    return memo[org_id]
+
+async def _fetch_org_plan(org_id: str) -> PlanType:
     """
     Fetches the organization's subscription plan from Clerk.
     In a real-world scenario, this might check Clerk's billing state 
@@ -43,7 +62,7 @@ async def get_org_plan(org_id: str) -> PlanType:
         return PlanType.STARTER  # Default to starter if no org
     
     if not CLERK_SECRET_KEY:
-        print("WARNING: CLERK_SECRET_KEY not set, defaulting to Starter plan.")
+        logger.warning("CLERK_SECRET_KEY not set, defaulting to Starter plan.")
         return PlanType.STARTER
 
     # Note: Clerk's Billing API is often tied to 'subscriptions'
@@ -69,7 +88,7 @@ async def get_org_plan(org_id: str) -> PlanType:
         
         return PlanType.STARTER
     except Exception as e:
-        print(f"Error fetching plan for org {org_id}: {e}")
+        logger.error("Error fetching plan for org %s: %s", org_id, e)
         return PlanType.STARTER
 
 async def get_org_member_count(org_id: str) -> int:
@@ -87,7 +106,7 @@ async def get_org_member_count(org_id: str) -> int:
                 return data.get("total_count", 0)
         return 0
     except Exception as e:
-        print(f"Error fetching member count for org {org_id}: {e}")
+        logger.error("Error fetching member count for org %s: %s", org_id, e)
         return 0
 
 async def check_limit(org_id: str, current_count: int, limit_attr: str):
@@ -101,3 +120,111 @@ async def check_limit(org_id: str, current_count: int, limit_attr: str):
             detail=f"Limit reached for your {plan_type} plan ({limit_value}). Please upgrade to Pro for unlimited access."
         )
     return True
+
+PEOPLE_RECONCILE_SECONDS = float(os.getenv("PEOPLE_RECONCILE_SECONDS", "300"))
+
+def _load_assignees(org_id: str) -> Set[str]:
+    from app.core.shards import session_for_org
+    from app.models.assignment import Assignment
+
+    db = session_for_org(org_id)
+    try:
+        rows = db.query(Assignment.assigned_to).filter(Assignment.org_id == org_id).distinct()
+        return {assigned_to for (assigned_to,) in rows}
+    finally:
+        db.close()
+
+class OrgPeopleCache:
+    """
+    Enforces PlanLimits.max_people at checkout without leaving the process.
+
+    Per org it keeps the plan, Clerk's member count and the set of distinct
+    assignees from the assignments table. A background task fills new orgs
+    and reconciles known ones every PEOPLE_RECONCILE_SECONDS; the request path
+    only reads memory. Until an org's first refresh lands, checkouts are
+    allowed rather than blocked on a Clerk call.
+    """
+
+    def __init__(self, interval: float = PEOPLE_RECONCILE_SECONDS):
+        self.interval = interval
+        self._orgs: Dict[str, dict] = {}
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def check_assignee(self, org_id: str, user_id: str):
+        with self._lock:
+            entry = self._orgs.get(org_id)
+        if entry is None:
+            self._request_refresh(org_id)
+            return
+
+        limit = PlanLimits(entry["plan"]).max_people
+        if limit == float('inf') or user_id in entry["assignees"]:
+            return
+        if len(entry["assignees"]) >= limit or entry["members"] > limit:
+            raise HTTPException(
+                status_code=403,
+                detail=f"Limit reached for your {entry['plan']} plan ({limit}). Please upgrade to Pro for unlimited access."
+            )
+
+    def record_assignee(self, org_id: str, user_id: str):
+        with self._lock:
+            entry = self._orgs.get(org_id)
+            if entry is not None:
+                entry["assignees"].add(user_id)
+
+    def _request_refresh(self, org_id: str):
+        with self._lock:
+            self._pending.add(org_id)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def refresh(self, org_id: str):
+        plan = await get_org_plan(org_id)
+        members, assignees = 0, set()
+        if PlanLimits(plan).max_people != float('inf'):
+            members = await get_org_member_count(org_id)
+            assignees = await run_in_threadpool(_load_assignees, org_id)
+        with self._lock:
+            self._orgs[org_id] = {
+                "plan": plan,
+                "members": members,
+                "assignees": assignees,
+                "refreshed_at": time.monotonic(),
+            }
+
+    async def start(self):
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+            self._loop = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            now = time.monotonic()
+            with self._lock:
+                due = set(self._pending)
+                self._pending.clear()
+                due.update(org_id for org_id, entry in self._orgs.items() if now - entry["refreshed_at"] >= self.interval)
+            for org_id in due:
+                try:
+                    await self.refresh(org_id)
+                except Exception as e:
+                    logger.error("Error reconciling people count for org %s: %s", org_id, e)
+
+people_cache = OrgPeopleCache()
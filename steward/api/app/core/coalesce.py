@@ -0,0 +1,174 @@
+"""
+Single-flight coalescing and an optional short-TTL cache for hot org-scoped GETs.
+
+Identical GETs (same org, role, path and query; same user too for non-admins,
+whose results are filtered to their own rows) that arrive while one is already
+running wait for it and receive a copy of its response instead of repeating
+the query. With RESPONSE_CACHE_TTL_SECONDS > 0, successful responses are also
+reused for that long.
+
+The token is verified here, before routing, so a response is only ever shared
+between callers with verified claims for the same org (see verify_scope).
+Any committed write for an org bumps its generation, which is part of every
+key, so later requests never see pre-write responses from this worker. Other workers only learn of the
+write via the TTL, which is why it defaults to off.
+"""
+import asyncio
+import os
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl
+from sqlalchemy import event
+from starlette.requests import Request
+from app.core.cache import LRUCache, MISSING
+from app.core.db import SessionLocal
+from app.core.debs import CONSISTENCY_HEADER
+from app.core.security import verify_scope, get_claim_org_id, get_claim_role
+
+COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "true").lower() != "false"
+COALESCE_PATHS = {p.strip() for p in os.getenv("COALESCE_PATHS", "/assets,/assignments/active").split(",") if p.strip()}
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "0"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+# Larger responses are streamed to their own caller only.
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(2 * 1024 * 1024)))
+
+
+class CapturedResponse:
+    def __init__(self, start: dict, body: bytes):
+        self.start = start
+        self.body = body
+
+    async def replay(self, send):
+        await send(self.start)
+        await send({"type": "http.response.body", "body": self.body, "more_body": False})
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL_SECONDS, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl or None)
+        self.inflight: Dict[Tuple, asyncio.Future] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0, "bypassed": 0, "invalidations": 0}
+
+    def generation(self, org_id: str) -> int:
+        return self._generations.get(org_id, 0)
+
+    def invalidate(self, org_id: str):
+        # Called from whichever thread committed; old keys simply age out of the LRU.
+        with self._lock:
+            self._generations[org_id] = self._generations.get(org_id, 0) + 1
+            self.counters["invalidations"] += 1
+
+    def stats(self) -> dict:
+        return {**self.counters, "inflight": len(self.inflight), "cached": len(self.cache), "ttl_seconds": self.ttl}
+
+
+response_cache = ResponseCache()
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_cache_orgs(session, flush_context):
+    orgs = session.info.setdefault("response_cache_orgs", set())
+    for objs in (session.new, session.dirty, session.deleted):
+        for obj in objs:
+            org_id = getattr(obj, "org_id", None)
+            if org_id:
+                orgs.add(org_id)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_cached_responses(session):
+    for org_id in session.info.pop("response_cache_orgs", ()):
+        response_cache.invalidate(org_id)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_cache_orgs(session):
+    session.info.pop("response_cache_orgs", None)
+
+
+class CoalescingMiddleware:
+    def __init__(self, app, cache: ResponseCache = response_cache, paths=COALESCE_PATHS):
+        self.app = app
+        self.cache = cache
+        self.paths = paths
+
+    async def _key(self, scope) -> Optional[Tuple]:
+        if Request(scope).headers.get(CONSISTENCY_HEADER, "").lower() == "strong":
+            return None
+        creds = await verify_scope(scope)
+        if creds is None:
+            return None
+
+        claims = creds.decoded
+        org_id = get_claim_org_id(claims)
+        if not org_id:
+            return None
+        role = get_claim_role(claims)
+        user_id = None if role == "org:admin" else claims.get("sub")
+        query = tuple(sorted(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True)))
+        return (org_id, self.cache.generation(org_id), role, user_id, scope["path"], query)
+
+    async def __call__(self, scope, receive, send):
+        if not (COALESCE_ENABLED and scope["type"] == "http" and scope["method"] == "GET"
+                and scope["path"] in self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        key = await self._key(scope)
+        if key is None:
+            self.cache.counters["bypassed"] += 1
+            await self.app(scope, receive, send)
+            return
+
+        if self.cache.ttl > 0:
+            cached = self.cache.cache.get(key)
+            if cached is not MISSING:
+                self.cache.counters["hits"] += 1
+                await cached.replay(send)
+                return
+
+        flight = self.cache.inflight.get(key)
+        if flight is not None:
+            self.cache.counters["coalesced"] += 1
+            captured = await asyncio.shield(flight)
+            if captured is not None:
+                await captured.replay(send)
+                return
+            # The leader failed or its response was not shareable: run our own.
+            await self.app(scope, receive, send)
+            return
+
+        self.cache.counters["misses"] += 1
+        flight = asyncio.get_running_loop().create_future()
+        self.cache.inflight[key] = flight
+        state = {"start": None, "chunks": [], "size": 0, "shareable": True}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                state["start"] = message
+                state["shareable"] = message["status"] == 200
+            elif message["type"] == "http.response.body" and state["shareable"]:
+                body = message.get("body", b"")
+                state["size"] += len(body)
+                if state["size"] > RESPONSE_CACHE_MAX_BYTES:
+                    state["shareable"] = False
+                    state["chunks"] = []
+                else:
+                    state["chunks"].append(body)
+            await send(message)
+
+        captured = None
+        try:
+            await self.app(scope, receive, capture)
+            if state["shareable"] and state["start"] is not None:
+                captured = CapturedResponse(state["start"], b"".join(state["chunks"]))
+        finally:
+            del self.cache.inflight[key]
+            flight.set_result(captured)
+
+        org_id, generation = key[0], key[1]
+        if captured is not None and self.cache.ttl > 0 and self.cache.generation(org_id) == generation:
+            self.cache.cache.set(key, captured)
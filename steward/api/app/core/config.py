@@ -1,27 +1,53 @@
 import os
 from dotenv import load_dotenv
 from pathlib import Path
+from typing import Dict, List
 
 # Load root .env.local (pulled from Vercel)
 ROOT_ENV = Path(__file__).resolve().parents[3] / ".env.local"
 if ROOT_ENV.exists():
     load_dotenv(ROOT_ENV)
 
+def normalize_database_url(url: str) -> str:
+    # SQLAlchemy requires 'postgresql://' or 'postgresql+psycopg://'.
+    # Since we have psycopg (v3) installed, we'll explicitly use it.
+    if url.startswith("postgres://"):
+        url = url.replace("postgres://", "postgresql+psycopg://", 1)
+    elif url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+psycopg://", 1)
+    return url
+
 def get_database_url() -> str:
     # Prioritize cloud database URLs (e.g., Vercel Postgres, Neon, etc.)
     url = os.getenv("POSTGRES_URL") or os.getenv("DATABASE_URL")
     
     if url:
-        # SQLAlchemy requires 'postgresql://' or 'postgresql+psycopg://'.
-        # Since we have psycopg (v3) installed, we'll explicitly use it.
-        if url.startswith("postgres://"):
-            url = url.replace("postgres://", "postgresql+psycopg://", 1)
-        elif url.startswith("postgresql://"):
-            url = url.replace("postgresql://", "postgresql+psycopg://", 1)
-        return url
+        return normalize_database_url(url)
         
     # Fallback to local SQLite for development only
     return "sqlite:///./test.db"
+
+def get_replica_urls() -> List[str]:
+    # Optional read replicas, comma separated. Empty means every read goes to the primary.
+    raw = os.getenv("DATABASE_REPLICA_URLS") or os.getenv("DATABASE_REPLICA_URL") or ""
+    return [normalize_database_url(url.strip()) for url in raw.split(",") if url.strip()]
+
+def get_shard_urls() -> Dict[str, str]:
+    # Additional databases orgs can be placed on, as "name=url" pairs, comma separated.
+    # DATABASE_URL itself is always the "default" shard.
+    raw = os.getenv("DATABASE_SHARDS", "")
+    shards = {}
+    for entry in raw.split(","):
+        if not entry.strip():
+            continue
+        name, sep, url = entry.partition("=")
+        if not sep or not name.strip() or not url.strip():
+            raise RuntimeError(f"DATABASE_SHARDS entries must look like name=url, got {entry.strip()!r}")
+        if name.strip() == "default":
+            raise RuntimeError("DATABASE_SHARDS cannot redefine the default shard; that is DATABASE_URL")
+        shards[name.strip()] = normalize_database_url(url.strip())
+    return shards
+
 def require_env(name: str) -> str:
     value = os.getenv(name)
     if not value:
@@ -1,25 +1,184 @@
-from sqlalchemy import create_engine
+import asyncio
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
-from .config import get_database_url
+from sqlalchemy.pool import NullPool, QueuePool
+from .config import get_database_url, get_replica_urls, get_shard_urls
 
 DATABASE_URL = get_database_url()
+REPLICA_URLS = get_replica_urls()
+SHARD_URLS = get_shard_urls()
+DEFAULT_SHARD = "default"
 
-connect_args = {}
-if "sqlite" in DATABASE_URL:
-    connect_args = {"check_same_thread": False}
-
-# Serverless-safe: avoid holding open pooled connections between invocations.
-# For SQLite local dev, we keep poolclass=NullPool or default. 
-# NullPool is fine for local dev to avoid "database is locked" in some serverless sims, 
-# but often Standard pool is better for SQLite. Let's stick to the existing NullPool for consistency 
-# unless it breaks.
-engine = create_engine(
-    DATABASE_URL,
-    connect_args=connect_args,
-    poolclass=NullPool,
-    pool_pre_ping=True,
-)
+logger = logging.getLogger(__name__)
+
+# A replica that fails to connect is skipped for this long before being retried.
+REPLICA_COOLDOWN_SECONDS = float(os.getenv("REPLICA_COOLDOWN_SECONDS", "30"))
+# After an org writes, its reads stay on the primary for this long to hide replication lag.
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+# Long-running servers (serve.py) keep this many connections per worker; 0 keeps
+# the serverless default of opening a connection per session.
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "0"))
+DATABASE_POOL_OVERFLOW = int(os.getenv("DATABASE_POOL_OVERFLOW", "10"))
+
+# File-backed SQLite (single-node sites, local dev) runs tuned unless SQLITE_TUNED=false;
+# see tune_sqlite. SQLITE_TUNED=false restores the old NullPool/default-pragmas setup.
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "true").lower() != "false"
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "8"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# How long a write started on the event loop thread may wait for the writer lock; see tune_sqlite.
+SQLITE_LOOP_WRITE_WAIT_MS = int(os.getenv("SQLITE_LOOP_WRITE_WAIT_MS", "100"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+_READ_ONLY_STATEMENTS = {"SELECT", "PRAGMA", "EXPLAIN"}
+
+def _is_sqlite_file(url: str) -> bool:
+    return url.startswith("sqlite") and ":memory:" not in url and "mode=memory" not in url and url.rstrip("/") != "sqlite:"
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+def _writer_wait(statement: str) -> float:
+    """Seconds to wait for the SQLite writer lock; short on the event loop thread, where waiting stalls the worker."""
+    if not _on_event_loop():
+        return SQLITE_BUSY_TIMEOUT_MS / 1000
+    logger.warning("SQLite write started on the event loop thread; move it to run_in_threadpool: %s", statement[:80])
+    return SQLITE_LOOP_WRITE_WAIT_MS / 1000
+
+def tune_sqlite(sqlite_engine: Engine):
+    """
+    WAL lets reads run alongside the writer, but SQLite still has one writer at
+    a time. Left to SQLite, contending writers poll its busy handler with
+    sleeps (long tail latency, then "database is locked"), and a transaction
+    that started by reading cannot upgrade to a write once another write has
+    committed.
+
+    So reads run outside any transaction (each statement sees the latest
+    commit, like Postgres' read committed), and the first write statement takes
+    this engine's writer lock and opens BEGIN IMMEDIATE; both are released at
+    commit or rollback. Writers in this process queue on the lock, writers in
+    other processes (serve.py workers) wait up to busy_timeout. Don't write
+    through a second session while one with pending writes is still open in
+    the same request: it would wait for the lock the first one holds.
+
+    The lock wait blocks its thread, so write from sync routes or through
+    run_in_threadpool, never inline in an ``async def`` route: on the event
+    loop thread it would stall every request on the worker. A write that does
+    start on the loop waits at most SQLITE_LOOP_WRITE_WAIT_MS and is logged.
+    """
+    writer = threading.Lock()
+
+    def release(info):
+        if info.pop("holds_writer", False):
+            writer.release()
+
+    @event.listens_for(sqlite_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None  # transactions are begun in _begin_write
+        cursor = dbapi_connection.cursor()
+        for pragma in (
+            "journal_mode=WAL",
+            "synchronous=NORMAL",  # durable across app crashes; a power loss may drop the last commits
+            f"busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+            f"mmap_size={SQLITE_MMAP_SIZE}",
+            f"cache_size=-{SQLITE_CACHE_SIZE_KB}",
+            "temp_store=MEMORY",
+        ):
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+    @event.listens_for(sqlite_engine, "before_cursor_execute")
+    def _begin_write(conn, cursor, statement, parameters, context, executemany):
+        dbapi_connection = conn.connection.driver_connection
+        if dbapi_connection.in_transaction or statement.lstrip()[:8].split(None, 1)[0].upper() in _READ_ONLY_STATEMENTS:
+            return
+        if not writer.acquire(timeout=_writer_wait(statement)):
+            raise sqlite3.OperationalError("database is locked (timed out waiting for the writer lock)")
+        conn.info["holds_writer"] = True
+        try:
+            dbapi_connection.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            release(conn.info)
+            raise
+
+    # Finish the transaction here so the lock is released only after it is
+    # durable; the DBAPI commit/rollback SQLAlchemy issues next is then a no-op.
+    @event.listens_for(sqlite_engine, "commit")
+    def _commit_write(conn):
+        if conn.info.get("holds_writer"):
+            try:
+                conn.connection.driver_connection.commit()
+            finally:
+                release(conn.info)
+
+    @event.listens_for(sqlite_engine, "rollback")
+    def _rollback_write(conn):
+        if conn.info.get("holds_writer"):
+            try:
+                conn.connection.driver_connection.rollback()
+            finally:
+                release(conn.info)
+
+    @event.listens_for(sqlite_engine.pool, "reset")
+    def _reset(dbapi_connection, connection_record, reset_state):
+        release(connection_record.info)
+
+    @event.listens_for(sqlite_engine.pool, "invalidate")
+    def _invalidate(dbapi_connection, connection_record, exception):
+        release(connection_record.info)
+
+def make_engine(url: str, sqlite_tuned: bool = SQLITE_TUNED) -> Engine:
+    connect_args = {}
+    if "sqlite" in url:
+        connect_args = {"check_same_thread": False}
+
+    # Serverless-safe: avoid holding open pooled connections between invocations.
+    # For SQLite local dev, we keep poolclass=NullPool or default.
+    # NullPool is fine for local dev to avoid "database is locked" in some serverless sims,
+    # but often Standard pool is better for SQLite. Let's stick to the existing NullPool for consistency
+    # unless it breaks.
+    tuned_sqlite = sqlite_tuned and _is_sqlite_file(url)
+    if DATABASE_POOL_SIZE > 0 and "sqlite" not in url:
+        pool_args = {"pool_size": DATABASE_POOL_SIZE, "max_overflow": DATABASE_POOL_OVERFLOW}
+    elif tuned_sqlite:
+        # Reusing connections keeps the page cache and mmap warm between requests.
+        pool_args = {"poolclass": QueuePool, "pool_size": SQLITE_POOL_SIZE, "max_overflow": SQLITE_POOL_SIZE}
+    else:
+        pool_args = {"poolclass": NullPool}
+    created = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_pre_ping=True,
+        **pool_args,
+    )
+    if tuned_sqlite:
+        tune_sqlite(created)
+    return created
+
+engine = make_engine(DATABASE_URL)
+# Replicas follow the default shard; orgs on other shards read from their shard.
+replica_engines: List[Engine] = [make_engine(url) for url in REPLICA_URLS]
+# shard name -> engine; which org lives where is looked up in app/core/shards.py.
+shard_engines: Dict[str, Engine] = {DEFAULT_SHARD: engine, **{name: make_engine(url) for name, url in SHARD_URLS.items()}}
+
+def all_engines() -> List[Engine]:
+    return [*shard_engines.values(), *replica_engines]
+
+def dispose_engines():
+    """Closes pooled connections, e.g. before forking so no socket is shared between processes."""
+    for e in all_engines():
+        e.dispose()
 
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -27,4 +186,61 @@ from sqlalchemy.ext.declarative import declarative_base
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# Bound per request to whichever replica is picked; see get_read_db in debs.py.
+ReadSessionLocal = sessionmaker(autoflush=False, autocommit=False, info={"read_only": True})
+
 Base = declarative_base()
+
+
+class ReplicaSet:
+    """Round-robin over replica engines, skipping ones that recently failed to connect."""
+
+    def __init__(self, engines: List[Engine], cooldown: float = REPLICA_COOLDOWN_SECONDS):
+        self.engines = engines
+        self.cooldown = cooldown
+        self._counter = itertools.count()
+        self._down_until: Dict[Engine, float] = {}
+
+    def candidates(self) -> List[Engine]:
+        if not self.engines:
+            return []
+        start = next(self._counter) % len(self.engines)
+        now = time.monotonic()
+        ordered = self.engines[start:] + self.engines[:start]
+        return [e for e in ordered if self._down_until.get(e, 0.0) <= now]
+
+    def mark_down(self, replica: Engine):
+        self._down_until[replica] = time.monotonic() + self.cooldown
+
+replicas = ReplicaSet(replica_engines)
+
+# org_id -> monotonic time of its last committed write in this worker
+_recent_writes: Dict[str, float] = {}
+
+def wrote_recently(org_id: str) -> bool:
+    last = _recent_writes.get(org_id)
+    return last is not None and time.monotonic() - last < REPLICA_STICKY_SECONDS
+
+@event.listens_for(ReadSessionLocal, "before_flush")
+def _reject_replica_writes(session, flush_context, instances):
+    raise RuntimeError("Attempted to write through a read-only replica session; use get_db for this route")
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_written_orgs(session, flush_context):
+    orgs = session.info.setdefault("written_orgs", set())
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        org_id = getattr(obj, "org_id", None)
+        if org_id:
+            orgs.add(org_id)
+
+@event.listens_for(SessionLocal, "after_commit")
+def _remember_written_orgs(session):
+    orgs = session.info.pop("written_orgs", None)
+    if orgs and replica_engines:
+        now = time.monotonic()
+        for org_id in orgs:
+            _recent_writes[org_id] = now
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_written_orgs(session):
+    session.info.pop("written_orgs", None)
@@ -1,8 +1,92 @@
-from typing import Generator
-from .db import SessionLocal
+from typing import Generator, Optional
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.exc import DBAPIError
+from .db import SessionLocal, ReadSessionLocal, DEFAULT_SHARD, replicas, shard_engines, wrote_recently
+from .security import clerk_guard, get_claim_org_id
+from .shards import placement_for_org
 
-def get_db() -> Generator:
-    db = SessionLocal()
+# Clients that must see their own write immediately (e.g. right after a checkout) send this.
+CONSISTENCY_HEADER = "x-read-consistency"
+
+def get_db(request: Request, creds: HTTPAuthorizationCredentials = Depends(clerk_guard)) -> Generator:
+    """Primary session on the shard the caller's org lives on."""
+    placement = placement_for_org(get_claim_org_id(creds.decoded))
+    # Any route on get_db may write (GET /incidents advances incident lifecycles), and a
+    # write landing on the source shard mid-move would be lost. Only get_read_db serves a moving org.
+    if placement.moving:
+        raise HTTPException(
+            status_code=503,
+            detail="This organization is being migrated; please retry shortly.",
+            headers={"Retry-After": "30"},
+        )
+    sessions = getattr(request.state, "batch_sessions", None)
+    if sessions is not None:
+        # Inside POST /batch: sub-requests share one session, which the batch closes.
+        if "primary" not in sessions:
+            read = sessions.get("read")
+            primary_engine = shard_engines[placement.shard]
+            sessions["primary"] = read if read is not None and read.get_bind() is primary_engine else SessionLocal(bind=primary_engine)
+        yield from _shared(sessions["primary"])
+        return
+    db = SessionLocal(bind=shard_engines[placement.shard])
+    # Lets get_read_db reuse this session when a route needs both.
+    request.state.primary_db = db
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _shared(db) -> Generator:
+    try:
+        yield db
+    except Exception:
+        # Leave the session usable for the batch's next sub-request.
+        db.rollback()
+        raise
+
+def _use_primary(request: Request, org_id: Optional[str]) -> bool:
+    if request.method not in ("GET", "HEAD"):
+        return True
+    if request.headers.get(CONSISTENCY_HEADER, "").lower() == "strong":
+        return True
+    return bool(org_id) and wrote_recently(org_id)
+
+def _open_read_session(request: Request, org_id: Optional[str]):
+    shard = placement_for_org(org_id).shard
+    if shard == DEFAULT_SHARD and not _use_primary(request, org_id):
+        for replica in replicas.candidates():
+            candidate = ReadSessionLocal(bind=replica)
+            try:
+                candidate.connection()
+            except DBAPIError:
+                candidate.close()
+                replicas.mark_down(replica)
+                continue
+            return candidate
+    return SessionLocal(bind=shard_engines[shard])
+
+def get_read_db(request: Request, creds: HTTPAuthorizationCredentials = Depends(clerk_guard)) -> Generator:
+    """
+    Session for side-effect-free reads. Goes to a healthy replica (round-robin)
+    when replicas are configured, and to the primary when there are none, when
+    the client asks for strong consistency, or when this org has just written.
+    Replicas mirror the default shard; orgs on other shards read their shard's primary.
+    """
+    primary = getattr(request.state, "primary_db", None)
+    if primary is not None:
+        yield primary
+        return
+
+    org_id = get_claim_org_id(creds.decoded)
+    sessions = getattr(request.state, "batch_sessions", None)
+    if sessions is not None:
+        if not sessions:
+            sessions["read"] = _open_read_session(request, org_id)
+        yield from _shared(sessions.get("primary") or sessions["read"])
+        return
+
+    db = _open_read_session(request, org_id)
     try:
         yield db
     finally:
@@ -0,0 +1,168 @@
+"""
+In-process pub/sub for new ActivityLog rows, feeding GET /activity/stream.
+
+Rows are captured when a session flushes them and published only once that
+session commits, so subscribers never see activity that was rolled back.
+Fan-out is per org: each subscriber holds a bounded queue and is dropped
+(with an ``overflow`` event telling it to resume via Last-Event-ID) when it
+falls too far behind, instead of buffering without limit.
+
+With ACTIVITY_PUBSUB_BACKEND=postgres, flushes queue a NOTIFY instead (Postgres
+delivers it on commit) and every worker LISTENs, so a client connected to any
+worker sees every write.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from sqlalchemy import event, text
+from app.core.db import SessionLocal, DATABASE_URL, SHARD_URLS
+from app.models.activity import ActivityLog
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_PUBSUB_BACKEND = os.getenv("ACTIVITY_PUBSUB_BACKEND", "memory")
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("ACTIVITY_STREAM_QUEUE_SIZE", "256"))
+NOTIFY_CHANNEL = "steward_activity"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+MAX_NOTIFY_PAYLOAD = 7900
+
+OVERFLOW = object()
+
+
+def serialize_activity(log: ActivityLog) -> Dict:
+    return {
+        "id": log.id,
+        "org_id": log.org_id,
+        "asset_id": log.asset_id,
+        "asset_name": log.asset_name,
+        "actor_id": log.actor_id,
+        "event_type": log.event_type,
+        "details": log.details,
+        "created_at": log.created_at.isoformat() if isinstance(log.created_at, datetime) else log.created_at,
+    }
+
+
+class Subscriber:
+    def __init__(self, org_id: str, loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.org_id = org_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize + 1)  # +1 leaves room for OVERFLOW
+        self.maxsize = maxsize
+        self.overflowed = False
+
+    def offer(self, item: Dict):
+        # Runs on the subscriber's event loop.
+        if self.overflowed:
+            return
+        if self.queue.qsize() >= self.maxsize:
+            self.overflowed = True
+            self.queue.put_nowait(OVERFLOW)
+            return
+        self.queue.put_nowait(item)
+
+
+class ActivityBroker:
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscriber]] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[asyncio.Task] = []
+
+    def subscribe(self, org_id: str) -> Subscriber:
+        sub = Subscriber(org_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(org_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        with self._lock:
+            subs = self._subscribers.get(sub.org_id)
+            if subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.org_id]
+
+    def subscriber_count(self, org_id: Optional[str] = None) -> int:
+        with self._lock:
+            if org_id:
+                return len(self._subscribers.get(org_id, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+    def fan_out(self, item: Dict):
+        """Delivers to this worker's subscribers. Safe to call from any thread."""
+        with self._lock:
+            subs = list(self._subscribers.get(item["org_id"], ()))
+        for sub in subs:
+            sub.loop.call_soon_threadsafe(sub.offer, item)
+
+    async def start(self):
+        # NOTIFY is sent on the shard that committed, so listen on every shard.
+        if ACTIVITY_PUBSUB_BACKEND == "postgres" and not self._listeners:
+            self._listeners = [asyncio.create_task(self._listen(url)) for url in [DATABASE_URL, *SHARD_URLS.values()]]
+
+    async def stop(self):
+        for listener in self._listeners:
+            listener.cancel()
+        self._listeners = []
+
+    async def _listen(self, url: str):
+        import psycopg
+
+        # psycopg wants a plain libpq URL, not SQLAlchemy's dialect+driver form.
+        dsn = url.replace("postgresql+psycopg://", "postgresql://", 1)
+        backoff = 1.0
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(dsn, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    backoff = 1.0
+                    async for notify in conn.notifies():
+                        self.fan_out(json.loads(notify.payload))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Activity LISTEN connection lost, retrying in %.0fs: %s", backoff, e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+
+broker = ActivityBroker()
+
+
+def _notify_payload(item: Dict) -> str:
+    payload = json.dumps(item, default=str)
+    if len(payload.encode()) > MAX_NOTIFY_PAYLOAD:
+        payload = json.dumps({**item, "details": None, "truncated": True}, default=str)
+    return payload
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_activity(session, flush_context):
+    new_logs = [serialize_activity(obj) for obj in session.new if isinstance(obj, ActivityLog)]
+    if not new_logs:
+        return
+    if ACTIVITY_PUBSUB_BACKEND == "postgres":
+        # NOTIFY is transactional: Postgres only delivers it if this transaction commits.
+        conn = session.connection()
+        for item in new_logs:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"),
+                         {"channel": NOTIFY_CHANNEL, "payload": _notify_payload(item)})
+    else:
+        session.info.setdefault("activity_outbox", []).extend(new_logs)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _publish_activity(session):
+    outbox = session.info.pop("activity_outbox", None)
+    if outbox:
+        for item in outbox:
+            broker.fan_out(item)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_activity(session):
+    session.info.pop("activity_outbox", None)
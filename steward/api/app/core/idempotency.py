@@ -0,0 +1,248 @@
+"""
+Idempotency-Key support for mutating requests.
+
+A client that may retry (flaky venue Wi-Fi) sends the same Idempotency-Key
+header with each attempt. The first attempt claims the key in the
+idempotency_keys table and runs normally; its response is stored once it
+finishes. Later attempts with that key get:
+
+- the stored response, replayed without touching domain tables
+  (marked with ``Idempotent-Replayed: true``);
+- 409 while the first attempt is still running;
+- 422 if the key was used for a different request (method, path or body).
+
+Transient failures release the key so the client can retry for real instead
+of getting the refusal replayed: server errors (5xx), 429 and any other response
+carrying Retry-After (load shedding, an org being moved). A claim whose worker
+died is taken over after IDEMPOTENCY_LOCK_SECONDS, and a background sweeper
+deletes keys older than IDEMPOTENCY_TTL_SECONDS.
+
+Keys are scoped per org, stored on the org's shard, and bypass the ORM session,
+so claiming one triggers none of the session listeners (activity feed, caches,
+replica stickiness).
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from starlette.responses import JSONResponse
+from sqlalchemy.engine import Engine
+from app.core.shards import engine_for_org, map_shards
+from app.core.security import verify_scope, get_claim_org_id
+from app.models.idempotency import IdempotencyRecord
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+IDEMPOTENCY_SWEEP_SECONDS = float(os.getenv("IDEMPOTENCY_SWEEP_SECONDS", "600"))
+IDEMPOTENCY_MAX_BODY = int(os.getenv("IDEMPOTENCY_MAX_BODY", str(1024 * 1024)))
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Uploads are content addressed already and their bodies are too large to buffer.
+EXCLUDED_PREFIXES = ("/uploads",)
+STORED_HEADERS = {b"content-type", b"location"}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything here is written in UTC.
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def claim_key(org_id: str, key: str, fingerprint: str) -> Tuple[str, Optional[object]]:
+    """
+    Returns ("claimed", record_id) when this request now owns the key, otherwise
+    ("replay", row), ("in_progress", row) or ("mismatch", row).
+    """
+    engine = engine_for_org(org_id)
+    for _ in range(3):
+        now = _now()
+        try:
+            with engine.begin() as conn:
+                result = conn.execute(insert(IdempotencyRecord).values(
+                    org_id=org_id, key=key, fingerprint=fingerprint, status="in_progress",
+                    locked_at=now, expires_at=now + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+                ))
+                return "claimed", result.inserted_primary_key[0]
+        except IntegrityError:
+            pass
+
+        with engine.begin() as conn:
+            row = conn.execute(select(IdempotencyRecord.__table__).where(
+                IdempotencyRecord.org_id == org_id, IdempotencyRecord.key == key
+            )).first()
+            if row is None:
+                continue  # swept or released meanwhile; try to claim again
+            if _aware(row.expires_at) <= now:
+                conn.execute(delete(IdempotencyRecord).where(IdempotencyRecord.id == row.id))
+                continue
+            if row.fingerprint != fingerprint:
+                return "mismatch", row
+            if row.status == "completed":
+                return "replay", row
+            # The owner may have died mid-request; take the key over once its lock is stale.
+            taken = conn.execute(update(IdempotencyRecord).where(
+                IdempotencyRecord.id == row.id,
+                IdempotencyRecord.status == "in_progress",
+                IdempotencyRecord.locked_at == row.locked_at,
+                IdempotencyRecord.locked_at < now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS),
+            ).values(locked_at=now))
+            if taken.rowcount == 1:
+                return "claimed", row.id
+            return "in_progress", row
+    return "in_progress", None
+
+
+def complete_key(org_id: str, record_id: int, status: int, headers: dict, body: bytes):
+    with engine_for_org(org_id).begin() as conn:
+        conn.execute(update(IdempotencyRecord).where(IdempotencyRecord.id == record_id).values(
+            status="completed", response_status=status, response_headers=headers, response_body=body,
+        ))
+
+
+def release_key(org_id: str, record_id: int):
+    with engine_for_org(org_id).begin() as conn:
+        conn.execute(delete(IdempotencyRecord).where(IdempotencyRecord.id == record_id))
+
+
+def sweep_expired(engine: Engine, batch_size: int = 1000) -> int:
+    removed = 0
+    while True:
+        with engine.begin() as conn:
+            expired = select(IdempotencyRecord.id).where(IdempotencyRecord.expires_at < _now()).limit(batch_size)
+            count = conn.execute(delete(IdempotencyRecord).where(IdempotencyRecord.id.in_(expired))).rowcount
+        removed += count
+        if count < batch_size:
+            return removed
+
+
+class IdempotencySweeper:
+    def __init__(self, interval: float = IDEMPOTENCY_SWEEP_SECONDS):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await run_in_threadpool(map_shards, sweep_expired)
+            except Exception as e:
+                logger.error("Error sweeping idempotency keys: %s", e)
+
+
+idempotency_sweeper = IdempotencySweeper()
+
+
+def _is_transient(status: Optional[int], retry_after: bool) -> bool:
+    """Responses that say "try again" rather than settle the request; their keys are released."""
+    return status is None or status >= 500 or status == 429 or retry_after
+
+
+def _error(status: int, detail: str, headers: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse(status_code=status, content={"detail": detail}, headers=headers)
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or scope["method"] not in MUTATING_METHODS
+                or scope["path"].startswith(EXCLUDED_PREFIXES)):
+            await self.app(scope, receive, send)
+            return
+        key = next((v.decode("latin-1") for k, v in scope["headers"] if k == IDEMPOTENCY_HEADER.encode()), None)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > 255:
+            await _error(400, "Idempotency-Key must be 1-255 characters")(scope, receive, send)
+            return
+
+        creds = await verify_scope(scope)
+        org_id = get_claim_org_id(creds.decoded) if creds else None
+        if not org_id:
+            await self.app(scope, receive, send)  # the route reports the auth error
+            return
+
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            size += len(message.get("body", b""))
+            if size > IDEMPOTENCY_MAX_BODY:
+                await _error(413, "Request body too large for an idempotent request")(scope, receive, send)
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        fingerprint = hashlib.sha256(
+            b"\0".join([scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body])
+        ).hexdigest()
+
+        outcome, record = await run_in_threadpool(claim_key, org_id, key, fingerprint)
+        if outcome == "mismatch":
+            await _error(422, "Idempotency-Key was already used for a different request")(scope, receive, send)
+            return
+        if outcome == "in_progress":
+            await _error(409, "A request with this Idempotency-Key is still in progress", {"Retry-After": "1"})(scope, receive, send)
+            return
+        if outcome == "replay":
+            headers = [(k.encode(), v.encode()) for k, v in (record.response_headers or {}).items()]
+            headers.append((b"idempotent-replayed", b"true"))
+            await send({"type": "http.response.start", "status": record.response_status, "headers": headers})
+            await send({"type": "http.response.body", "body": record.response_body or b""})
+            return
+
+        record_id = record
+        body_sent = False
+
+        async def replay_body():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response = {"status": None, "headers": {}, "chunks": [], "retry_after": False}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["retry_after"] = any(k.lower() == b"retry-after" for k, _ in message.get("headers", []))
+                response["headers"] = {
+                    k.decode("latin-1"): v.decode("latin-1") for k, v in message.get("headers", []) if k.lower() in STORED_HEADERS
+                }
+            elif message["type"] == "http.response.body":
+                response["chunks"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, capture)
+        except BaseException:
+            await run_in_threadpool(release_key, org_id, record_id)
+            raise
+        if _is_transient(response["status"], response["retry_after"]):
+            await run_in_threadpool(release_key, org_id, record_id)
+        else:
+            await run_in_threadpool(complete_key, org_id, record_id, response["status"], response["headers"], b"".join(response["chunks"]))
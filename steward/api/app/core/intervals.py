@@ -0,0 +1,158 @@
+"""
+Interval tree over half-open [start, end) intervals.
+
+A treap ordered by (start, key) where every node also stores the largest end
+in its subtree, so an overlap query skips any subtree that ends before the
+window and stops walking right once starts pass the window's end:
+O(log n + k) for k results. Insert and remove are O(log n) expected.
+"""
+import random
+from typing import Any, Hashable, Iterable, List, Optional, Tuple
+
+Interval = Tuple[Any, Any, Hashable]  # (start, end, key)
+
+
+class _Node:
+    __slots__ = ("start", "end", "key", "priority", "max_end", "left", "right")
+
+    def __init__(self, start, end, key, priority: float):
+        self.start = start
+        self.end = end
+        self.key = key
+        self.priority = priority
+        self.max_end = end
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+
+def _update(node: _Node) -> _Node:
+    node.max_end = node.end
+    if node.left is not None and node.left.max_end > node.max_end:
+        node.max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > node.max_end:
+        node.max_end = node.right.max_end
+    return node
+
+
+def _split(node: Optional[_Node], start, key) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """Nodes ordered before (start, key), and the rest."""
+    if node is None:
+        return None, None
+    if (node.start, node.key) < (start, key):
+        node.right, right = _split(node.right, start, key)
+        return _update(node), right
+    left, node.left = _split(node.left, start, key)
+    return left, _update(node)
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+class IntervalTree:
+    """Keys must be unique and orderable among intervals with the same start."""
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self._root: Optional[_Node] = None
+        self._size = 0
+        ordered = sorted(intervals, key=lambda iv: (iv[0], iv[2]))
+        if ordered:
+            self._root = self._build(ordered)
+            self._size = len(ordered)
+
+    @staticmethod
+    def _build(ordered: List[Interval]) -> _Node:
+        # Balanced from sorted input in one pass; random priorities handed out
+        # highest-first by depth keep the heap order of a treap built by inserts.
+        priorities = iter(sorted((random.random() for _ in ordered), reverse=True))
+        nodes: List[Optional[_Node]] = [None] * len(ordered)
+        queue = [(0, len(ordered))]
+        for lo, hi in queue:  # grows while iterating: breadth first
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            start, end, key = ordered[mid]
+            nodes[mid] = _Node(start, end, key, next(priorities))
+            queue.append((lo, mid))
+            queue.append((mid + 1, hi))
+
+        def link(lo: int, hi: int) -> Optional[_Node]:
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = nodes[mid]
+            node.left = link(lo, mid)
+            node.right = link(mid + 1, hi)
+            return _update(node)
+
+        return link(0, len(ordered))
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, start, end, key: Hashable):
+        if not start < end:
+            raise ValueError("Interval must end after it starts")
+        left, right = _split(self._root, start, key)
+        self._root = _merge(_merge(left, _Node(start, end, key, random.random())), right)
+        self._size += 1
+
+    def remove(self, start, key: Hashable) -> bool:
+        """Removes the interval added with this start and key; False if absent."""
+        left, rest = _split(self._root, start, key)
+        match, right = self._split_one(rest, start, key)
+        self._root = _merge(left, right)
+        if match is None:
+            return False
+        self._size -= 1
+        return True
+
+    @staticmethod
+    def _split_one(node: Optional[_Node], start, key) -> Tuple[Optional[_Node], Optional[_Node]]:
+        # ``node`` holds everything at or after (start, key); detach its first node if it matches.
+        if node is None:
+            return None, None
+        if node.left is not None:
+            match, node.left = IntervalTree._split_one(node.left, start, key)
+            return match, _update(node)
+        if node.start == start and node.key == key:
+            return node, node.right
+        return None, node
+
+    def overlapping(self, start, end) -> List[Interval]:
+        """Intervals with start < ``end`` and end > ``start``, ordered by start."""
+        found: List[Interval] = []
+        stack = []
+        node = self._root
+        while stack or node is not None:
+            # Walk left as long as something down there can still reach the window.
+            while node is not None and node.max_end > start:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.start >= end:
+                break  # everything after this starts too late
+            if node.end > start:
+                found.append((node.start, node.end, node.key))
+            node = node.right
+        return found
+
+    def __iter__(self):
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.start, node.end, node.key
+            node = node.right
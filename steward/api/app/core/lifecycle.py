@@ -0,0 +1,140 @@
+"""
+Worker readiness and start-up warm-up, backing GET /ready.
+
+/health only says the process is alive. /ready says this worker should get
+traffic: it is 503 until warm_up() has run and again once the launcher
+(serve.py) starts draining, so a load balancer stops routing here before the
+worker is told to exit.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import date, timedelta
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, text
+from app.core.billing import people_cache
+from sqlalchemy.engine import Engine
+from app.core.db import all_engines, DATABASE_POOL_SIZE
+from app.core.shards import map_engines, map_shards
+from app.core.security import clerk_guard
+from app.models.activity import ActivityDailyRollup
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() != "false"
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "20"))
+# How many recently active orgs to preload plan / people limits for.
+WARMUP_ORGS = int(os.getenv("WARMUP_ORGS", "50"))
+
+
+class Lifecycle:
+    def __init__(self):
+        self.ready = False
+        self._draining = False
+        # multiprocessing.Value shared by all workers when run under serve.py
+        self._shared_draining = None
+
+    def share_draining_flag(self, flag):
+        self._shared_draining = flag
+
+    @property
+    def draining(self) -> bool:
+        if self._shared_draining is not None and self._shared_draining.value:
+            return True
+        return self._draining
+
+    def start_draining(self):
+        self._draining = True
+        if self._shared_draining is not None:
+            self._shared_draining.value = 1
+
+    def status(self) -> str:
+        if self.draining:
+            return "draining"
+        return "ready" if self.ready else "starting"
+
+
+lifecycle = Lifecycle()
+
+
+def _fill_pool(e: Engine):
+    conns = []
+    try:
+        for _ in range(max(DATABASE_POOL_SIZE, 1)):
+            conn = e.connect()
+            conns.append(conn)
+            conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            conn.close()
+
+
+def _open_pools():
+    # Check out pool_size connections at once so the pool is full before traffic
+    # arrives; with NullPool this just proves the database is reachable.
+    # Every shard and replica at once, so startup waits for the slowest only.
+    map_engines(_fill_pool, all_engines())
+
+
+def _fetch_jwks():
+    clerk_guard.refresh_keys()
+    if not clerk_guard.jwks_keys.get("keys"):
+        raise RuntimeError("no keys loaded; they will be fetched on the first request")
+
+
+def _recent_orgs(limit: int):
+    since = date.today() - timedelta(days=1)
+
+    def recent(e: Engine):
+        with e.connect() as conn:
+            return conn.execute(
+                select(ActivityDailyRollup.org_id).where(ActivityDailyRollup.day >= since)
+                .group_by(ActivityDailyRollup.org_id).limit(limit)
+            ).scalars().all()
+
+    orgs = [org_id for shard_orgs in map_shards(recent).values() for org_id in shard_orgs]
+    return orgs[:limit]
+
+
+async def _prime_people_cache():
+    orgs = await run_in_threadpool(_recent_orgs, WARMUP_ORGS)
+    semaphore = asyncio.Semaphore(8)
+
+    async def refresh(org_id):
+        async with semaphore:
+            await people_cache.refresh(org_id)
+
+    await asyncio.gather(*(refresh(o) for o in orgs), return_exceptions=True)
+    return len(orgs)
+
+
+async def _step(name: str, coro) -> Optional[object]:
+    started = time.perf_counter()
+    try:
+        result = await coro
+        logger.info("Warm-up: %s done in %.0fms", name, (time.perf_counter() - started) * 1000)
+        return result
+    except Exception as e:
+        logger.warning("Warm-up: %s failed: %s", name, e)
+        return None
+
+
+async def warm_up():
+    """
+    Runs during lifespan startup; uvicorn only starts accepting on the socket
+    once it returns. Steps are best effort: a failure is logged and the worker
+    still becomes ready, since each cache also fills lazily on first use.
+    """
+    if WARMUP_ENABLED:
+        async def steps():
+            await _step("JWKS", run_in_threadpool(_fetch_jwks))
+            await _step("database pools", run_in_threadpool(_open_pools))
+            await _step("plan and people limits", _prime_people_cache())
+
+        try:
+            await asyncio.wait_for(steps(), timeout=WARMUP_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Warm-up: timed out after %.0fs, continuing", WARMUP_TIMEOUT_SECONDS)
+    lifecycle.ready = True
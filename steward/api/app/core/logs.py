@@ -0,0 +1,186 @@
+"""
+Structured JSON logging that never blocks the caller.
+
+Log calls only format the message and put the record on a bounded in-memory
+queue; a listener thread writes JSON lines to stdout. If the queue is full the
+record is dropped (and counted) rather than stalling the event loop.
+
+Each distinct message template (logger + unformatted msg, so always log with
+%-style args, not f-strings) may emit LOG_RATE_BURST records per
+LOG_RATE_WINDOW_SECONDS; the rest are dropped and the next record that gets
+through carries a ``suppressed`` count. LOG_SAMPLE_RATE additionally samples
+DEBUG/INFO records. Records carry the request id of the request that produced
+them (see RequestIdMiddleware).
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+import app.core.config  # loads .env before the settings below are read
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_RATE_BURST = int(os.getenv("LOG_RATE_BURST", "20"))
+LOG_RATE_WINDOW_SECONDS = float(os.getenv("LOG_RATE_WINDOW_SECONDS", "10"))
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+REQUEST_ID_HEADER = "x-request-id"
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed via extra= and is emitted as a field.
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "request_id", "suppressed", "color_message"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if getattr(record, "suppressed", 0):
+            entry["suppressed"] = record.suppressed
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """Per-template token window plus probabilistic sampling of DEBUG/INFO."""
+
+    def __init__(self, burst: int = LOG_RATE_BURST, window: float = LOG_RATE_WINDOW_SECONDS,
+                 sample_rate: float = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.sample_rate = sample_rate
+        self._windows: Dict[Tuple, list] = {}  # key -> [window_start, emitted, suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.INFO and self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                if len(self._windows) > 10_000:
+                    self._windows.clear()
+                self._windows[key] = [now, 1, 0]
+                record.suppressed = suppressed
+                return True
+            if state[1] < self.burst:
+                state[1] += 1
+                record.suppressed = 0
+                return True
+            state[2] += 1
+            return False
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve everything that depends on the calling thread or live objects now;
+        # keep the structure (unlike the default, which flattens into one string).
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[_NonBlockingQueueHandler] = None
+
+
+def configure_logging(force: bool = False):
+    """
+    Installs the queue handler on the root logger and starts the writer thread.
+    Idempotent; pass force=True in a forked child, which inherits the handler but
+    not the parent's writer thread.
+    """
+    global _listener, _handler
+    if _handler is not None and not force:
+        return
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+    q: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _handler = _NonBlockingQueueHandler(q)
+    _handler.addFilter(RateLimitFilter())
+    root.addHandler(_handler)
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(q, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def logging_stats() -> dict:
+    return {"dropped": _handler.dropped if _handler else 0, "queued": _handler.queue.qsize() if _handler else 0}
+
+
+@atexit.register
+def flush_logs():
+    """Writes out everything still queued; for exits that skip atexit (os._exit)."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+
+
+class RequestIdMiddleware:
+    """Tags each request with an id (the client's X-Request-ID if sane) for log correlation."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        incoming = next((v.decode("latin-1") for k, v in scope["headers"] if k == REQUEST_ID_HEADER.encode()), "")
+        request_id = incoming if 0 < len(incoming) <= 128 and incoming.isprintable() else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                # Copy rather than mutate: inner middleware may replay this message to other requests.
+                message = {**message, "headers": [*message.get("headers", []), (REQUEST_ID_HEADER.encode(), request_id.encode())]}
+            await send(message)
+
+        # Left set if the app raises: the 500 handler runs outside this middleware and
+        # still needs the id, and each request runs in its own task context anyway.
+        await self.app(scope, receive, send_with_id)
+        request_id_var.reset(token)
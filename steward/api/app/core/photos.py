@@ -0,0 +1,92 @@
+"""
+Photo processing for POST /uploads/photos, run in a process pool so decoding
+and resizing never block the event loop or hold the GIL in the API process.
+
+process_photo runs in the pool's child processes, which start with "spawn"
+(safe alongside the server's threads) and import only this module's
+dependencies.
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, List, Optional
+
+PHOTO_WORKERS = int(os.getenv("PHOTO_WORKERS", "2"))
+# Longest edge in pixels for each generated size.
+PHOTO_SIZES: Dict[str, int] = {"thumb": 256, "medium": 1024}
+# Refuse decompression bombs: a small file can decode to gigabytes.
+MAX_PHOTO_PIXELS = int(os.getenv("MAX_PHOTO_PIXELS", str(50_000_000)))
+
+
+class InvalidPhoto(ValueError):
+    pass
+
+
+def process_photo(src_path: str, out_dir: str, sizes: Dict[str, int]) -> List[Dict]:
+    """
+    Decodes the upload, applies its EXIF orientation and re-encodes it without
+    metadata as ``original`` plus one downscaled copy per entry in ``sizes``.
+    Outputs are written to out_dir; returns one dict per variant.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(src_path) as img:
+            if img.width * img.height > MAX_PHOTO_PIXELS:
+                raise InvalidPhoto(f"Image is too large ({img.width}x{img.height})")
+            img = ImageOps.exif_transpose(img)
+            img.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise InvalidPhoto("Not a supported or readable image")
+
+    has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+    img = img.convert("RGBA" if has_alpha else "RGB")
+    fmt, ext, content_type = ("PNG", "png", "image/png") if has_alpha else ("JPEG", "jpg", "image/jpeg")
+
+    variants = []
+
+    def save(name: str, image):
+        path = os.path.join(out_dir, f"{name}.{ext}")
+        # A freshly built image carries no EXIF/XMP, so nothing from the upload's metadata survives.
+        options = {"optimize": True}
+        if fmt == "JPEG":
+            options.update(quality=85 if name != "original" else 90, progressive=True)
+        image.save(path, fmt, **options)
+        variants.append({
+            "name": name, "path": path, "ext": ext, "content_type": content_type,
+            "width": image.width, "height": image.height,
+        })
+
+    clean = Image.new(img.mode, img.size)
+    clean.paste(img)
+    save("original", clean)
+    for name, edge in sizes.items():
+        if max(clean.size) <= edge:
+            save(name, clean)
+            continue
+        thumb = clean.copy()
+        thumb.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        save(name, thumb)
+    return variants
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PHOTO_WORKERS, mp_context=get_context("spawn"))
+    return _pool
+
+
+async def process_photo_async(src_path: str, out_dir: str, sizes: Dict[str, int] = PHOTO_SIZES) -> List[Dict]:
+    return await asyncio.get_running_loop().run_in_executor(_get_pool(), process_photo, src_path, out_dir, sizes)
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
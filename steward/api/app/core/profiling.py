@@ -0,0 +1,335 @@
+"""
+Opt-in statistical profiling of individual requests.
+
+Off by default, and when off nothing is installed: no middleware, no engine
+listeners. With PROFILING_ENABLED=true a request is profiled when it carries
+``X-Profile: <PROFILING_TOKEN>`` or is picked by PROFILING_SAMPLE_RATE.
+
+While a profiled request runs, a sampler thread records the Python stack of
+the event loop thread and of every busy worker thread each
+PROFILING_INTERVAL_MS (wall clock, so time spent waiting on the database or
+Clerk shows up too). Samples come from the whole worker, so requests running
+concurrently on it can appear as well; profile a quiet worker for clean
+results. SQL statements the request runs are timed through engine events,
+without their parameters.
+
+Each profile is written to PROFILING_DIR as ``<id>.json`` (request, timings,
+SQL), ``<id>.speedscope.json`` (open in https://www.speedscope.app) and
+``<id>.collapsed.txt`` (flamegraph.pl / collapsed stacks). Only the newest
+PROFILING_KEEP are kept. The response carries ``X-Profile-Id``.
+
+Because samples span the whole worker, a profile can hold other orgs' stacks
+and server paths. The /profiles routes are therefore for operators only: they
+need the same ``X-Profile: <PROFILING_TOKEN>`` header, not an org role.
+"""
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.logs import request_id_var
+from app.core.security import verify_scope, get_claim_org_id
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+PROFILING_DIR = os.getenv("PROFILING_DIR", "./profiles")
+PROFILING_KEEP = int(os.getenv("PROFILING_KEEP", "100"))
+# Samplers are cheap but not free; further requests run unprofiled.
+PROFILING_MAX_CONCURRENT = int(os.getenv("PROFILING_MAX_CONCURRENT", "2"))
+PROFILING_MAX_SAMPLES = int(os.getenv("PROFILING_MAX_SAMPLES", "20000"))
+PROFILING_MAX_STATEMENTS = 500
+PROFILE_HEADER = "x-profile"
+PROFILE_ID_HEADER = "x-profile-id"
+EXCLUDED_PREFIXES = ("/profiles",)
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9A-Za-z-]{1,64}$")
+# Innermost frames of a thread with nothing to do (idle pool workers, the logging writer, a parked loop).
+IDLE_FRAMES = {("threading.py", "wait"), ("queue.py", "get"), ("selectors.py", "select")}
+LOOP_IDLE = "(event loop waiting)"
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+current_profile: ContextVar[Optional["Profile"]] = ContextVar("current_profile", default=None)
+
+
+def _stack(frame) -> List[Frame]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def _is_idle(stack: List[Frame]) -> bool:
+    if not stack:
+        return True
+    name, filename, _ = stack[-1]
+    return (os.path.basename(filename), name.rsplit(".", 1)[-1]) in IDLE_FRAMES
+
+
+class Sampler(threading.Thread):
+    def __init__(self, loop_thread: int, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.loop_thread = loop_thread
+        self.interval = interval
+        self.samples: List[Tuple[str, Tuple[Frame, ...]]] = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval) and len(self.samples) < PROFILING_MAX_SAMPLES:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if names.get(ident) == self.name:
+                    continue
+                stack = _stack(frame)
+                if _is_idle(stack):
+                    if ident != self.loop_thread:
+                        continue
+                    stack = [(LOOP_IDLE, "", 0)]
+                self.samples.append((names.get(ident, str(ident)), tuple(stack)))
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class Profile:
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.org_id: Optional[str] = None
+        self.status: Optional[int] = None
+        self.request_id: Optional[str] = None
+        self.started_at = datetime.now(timezone.utc)
+        self.duration_ms = 0.0
+        self.statements: List[Dict] = []
+        self._lock = threading.Lock()
+        self._sampler = Sampler(threading.get_ident(), PROFILING_INTERVAL_MS / 1000)
+        self._started = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._sampler.start()
+
+    def stop(self):
+        self._sampler.stop()
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def record_statement(self, statement: str, ms: float, rows: int):
+        with self._lock:
+            if len(self.statements) < PROFILING_MAX_STATEMENTS:
+                self.statements.append({"statement": statement, "ms": round(ms, 3), "rows": rows})
+
+    @property
+    def samples(self):
+        return self._sampler.samples
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "org_id": self.org_id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "reason": self.reason,
+            "request_id": self.request_id,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "interval_ms": PROFILING_INTERVAL_MS,
+            "samples": len(self.samples),
+            "sql_count": len(self.statements),
+            "sql_ms": round(sum(s["ms"] for s in self.statements), 3),
+        }
+
+
+def _frame_label(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({os.path.basename(filename)}:{line})" if filename else name
+
+
+def collapsed_stacks(profile: Profile) -> str:
+    counts = Counter(
+        ";".join([thread, *(_frame_label(f).replace(";", ":") for f in stack)])
+        for thread, stack in profile.samples
+    )
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+def speedscope(profile: Profile) -> Dict:
+    """One sampled profile per thread, in the speedscope file format."""
+    frames: List[Dict] = []
+    index: Dict[Frame, int] = {}
+    by_thread: Dict[str, List[List[int]]] = {}
+    for thread, stack in profile.samples:
+        ids = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                name, filename, line = frame
+                frames.append({"name": name, "file": filename, "line": line} if filename else {"name": name})
+            ids.append(index[frame])
+        by_thread.setdefault(thread, []).append(ids)
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": f"{profile.method} {profile.path} ({profile.id})",
+        "exporter": "steward",
+        "activeProfileIndex": 0,
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": thread,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": len(samples) * PROFILING_INTERVAL_MS,
+                "samples": samples,
+                "weights": [PROFILING_INTERVAL_MS] * len(samples),
+            }
+            for thread, samples in by_thread.items()
+        ],
+    }
+
+
+def profile_dir() -> Path:
+    return Path(PROFILING_DIR).resolve()
+
+
+def write_profile(profile: Profile):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / f"{profile.id}.speedscope.json").write_text(json.dumps(speedscope(profile)))
+    (directory / f"{profile.id}.collapsed.txt").write_text(collapsed_stacks(profile))
+    # The summary is written last; list_profiles only sees complete profiles.
+    (directory / f"{profile.id}.json").write_text(json.dumps({**profile.summary(), "sql": profile.statements}))
+
+    summaries = sorted(directory.glob("*-*.json"), key=lambda p: p.name, reverse=True)
+    for stale in [p for p in summaries if not p.name.endswith(".speedscope.json")][PROFILING_KEEP:]:
+        stem = stale.name[:-len(".json")]
+        for suffix in (".json", ".speedscope.json", ".collapsed.txt"):
+            (directory / f"{stem}{suffix}").unlink(missing_ok=True)
+
+
+def has_profiling_token(supplied: Optional[str]) -> bool:
+    return bool(PROFILING_TOKEN and supplied) and hmac.compare_digest(supplied.encode(), PROFILING_TOKEN.encode())
+
+
+def list_profiles(org_id: Optional[str] = None, limit: int = 50) -> List[Dict]:
+    directory = profile_dir()
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for path in sorted(directory.glob("*.json"), key=lambda p: p.name, reverse=True):
+        if path.name.endswith(".speedscope.json"):
+            continue
+        try:
+            summary = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        if org_id is None or summary.get("org_id") == org_id:
+            summary.pop("sql", None)
+            profiles.append(summary)
+            if len(profiles) >= limit:
+                break
+    return profiles
+
+
+def profile_path(profile_id: str, suffix: str) -> Optional[Path]:
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = profile_dir() / f"{profile_id}{suffix}"
+    return path if path.is_file() else None
+
+
+_sql_hooks_installed = False
+
+
+def install_sql_hooks():
+    """Times statements on every engine, for the profile (if any) of the calling context."""
+    global _sql_hooks_installed
+    if _sql_hooks_installed:
+        return
+    _sql_hooks_installed = True
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_profile.get() is not None:
+            conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        profile = current_profile.get()
+        started = conn.info.get("profile_started")
+        if profile is None or not started:
+            return
+        ms = (time.perf_counter() - started.pop()) * 1000
+        profile.record_statement(statement, ms, cursor.rowcount)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._active = 0
+        install_sql_hooks()
+
+    def _reason(self, scope) -> Optional[str]:
+        if scope["type"] != "http" or scope["path"].startswith(EXCLUDED_PREFIXES):
+            return None
+        supplied = next((v for k, v in scope["headers"] if k == PROFILE_HEADER.encode()), b"")
+        if has_profiling_token(supplied.decode("latin-1")):
+            return "header"
+        if PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        reason = self._reason(scope)
+        if reason is None or self._active >= PROFILING_MAX_CONCURRENT:
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"], reason)
+        creds = await verify_scope(scope)
+        profile.org_id = get_claim_org_id(creds.decoded) if creds else None
+        profile.request_id = request_id_var.get()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (PROFILE_ID_HEADER.encode(), profile.id.encode())]}
+            await send(message)
+
+        self._active += 1
+        token = current_profile.set(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.stop()
+            current_profile.reset(token)
+            self._active -= 1
+            try:
+                await run_in_threadpool(write_profile, profile)
+            except OSError as e:
+                logger.error("Error writing profile %s: %s", profile.id, e)
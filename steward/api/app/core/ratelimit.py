@@ -0,0 +1,185 @@
+"""
+Token-bucket rate limiting keyed by org and by user.
+
+Every limited route spends ``cost`` tokens from two buckets, one for the org
+and one for the calling user; the request only goes through if both have
+enough. Buckets refill continuously at ``rate`` tokens/second up to ``burst``.
+
+The in-memory backend is per worker process. Set RATE_LIMIT_BACKEND=redis to
+share buckets between workers (any Redis-compatible server works, including a
+local redis-server or fakeredis in development).
+"""
+import logging
+import math
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from app.core.security import clerk_guard, get_claim_org_id
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() not in ("0", "false", "no")
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+
+ORG_RATE = float(os.getenv("RATE_LIMIT_ORG_PER_SECOND", "20"))
+ORG_BURST = float(os.getenv("RATE_LIMIT_ORG_BURST", "120"))
+USER_RATE = float(os.getenv("RATE_LIMIT_USER_PER_SECOND", "5"))
+USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", "30"))
+
+# (key, rate, burst)
+Bucket = Tuple[str, float, float]
+
+
+class InMemoryBackend:
+    """
+    Buckets in a dict of [tokens, last_refill]. Only touched from the event
+    loop, so no locking is needed.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, List[float]] = {}
+        self._next_prune = 0.0
+
+    async def acquire(self, buckets: Sequence[Bucket], cost: float) -> float:
+        return self.acquire_now(buckets, cost, time.monotonic())
+
+    def acquire_now(self, buckets: Sequence[Bucket], cost: float, now: float) -> float:
+        """Takes ``cost`` from every bucket or none; returns 0 or the seconds to wait."""
+        store = self._buckets
+        levels = []
+        wait = 0.0
+        for key, rate, burst in buckets:
+            state = store.get(key)
+            tokens = burst if state is None else min(burst, state[0] + (now - state[1]) * rate)
+            levels.append(tokens)
+            if tokens < cost:
+                wait = max(wait, (cost - tokens) / rate)
+
+        if wait:
+            return wait
+
+        for (key, _, _), tokens in zip(buckets, levels):
+            state = store.get(key)
+            if state is None:
+                store[key] = [tokens - cost, now]
+            else:
+                state[0] = tokens - cost
+                state[1] = now
+
+        if len(store) > self.max_keys and now >= self._next_prune:
+            self._prune(now)
+            self._next_prune = now + 1.0
+        return 0.0
+
+    def _prune(self, now: float):
+        # Buckets idle long enough to have refilled completely carry no state worth keeping.
+        idle = max(ORG_BURST / ORG_RATE, USER_BURST / USER_RATE)
+        for key in [k for k, (_, last) in self._buckets.items() if now - last > idle]:
+            del self._buckets[key]
+
+
+# Same algorithm as InMemoryBackend, run atomically on the server with its clock.
+_REDIS_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = burst
+    if state[1] then
+        tokens = math.min(burst, tonumber(state[1]) + (now - tonumber(state[2])) * rate)
+    end
+    levels[i] = tokens
+    if tokens < cost then
+        wait = math.max(wait, (cost - tokens) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    redis.call('HSET', key, 'tokens', levels[i] - cost, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+return '0'
+"""
+
+
+class RedisBackend:
+    """Buckets shared by every worker through a Redis-compatible server."""
+
+    def __init__(self, client=None, url: str = RATE_LIMIT_REDIS_URL, prefix: str = "steward:rl:"):
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+            client = redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(_REDIS_SCRIPT)
+
+    async def acquire(self, buckets: Sequence[Bucket], cost: float) -> float:
+        keys = [self.prefix + key for key, _, _ in buckets]
+        args = [cost]
+        for _, rate, burst in buckets:
+            args.extend((rate, burst))
+        return float(await self._script(keys=keys, args=args))
+
+
+class RateLimiter:
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def check(self, org_id: Optional[str], user_id: Optional[str], cost: float) -> float:
+        buckets = []
+        if org_id:
+            buckets.append(("org:" + org_id, ORG_RATE, ORG_BURST))
+        if user_id:
+            buckets.append(("user:" + user_id, USER_RATE, USER_BURST))
+        if not buckets:
+            return 0.0
+        try:
+            return await self.backend.acquire(buckets, cost)
+        except Exception as e:
+            # A broken shared backend must not take the API down with it.
+            logger.error("Rate limiter backend error, allowing request: %s", e)
+            return 0.0
+
+
+def _make_backend():
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend()
+    return InMemoryBackend()
+
+limiter = RateLimiter(_make_backend())
+
+
+def rate_limit(cost: float = 1.0):
+    """
+    Route dependency spending ``cost`` tokens from the caller's org and user
+    buckets, e.g. ``dependencies=[Depends(rate_limit(5))]``. Raises 429 with
+    Retry-After when either bucket is empty.
+    """
+    async def dependency(creds: HTTPAuthorizationCredentials = Depends(clerk_guard)):
+        if not RATE_LIMIT_ENABLED:
+            return
+        claims = creds.decoded
+        retry_after = await limiter.check(get_claim_org_id(claims), claims.get("sub"), cost)
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests. Please slow down and retry shortly.",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+    return dependency
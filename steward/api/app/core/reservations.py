@@ -0,0 +1,212 @@
+"""
+Conflict and availability checks for reservations.
+
+On Postgres the ex_reservations_asset_period exclusion constraint refuses
+overlapping live reservations of an asset, and availability is one query on
+the GiST period index. SQLite has neither, so each worker keeps an
+IntervalTree of every recently used org's live reservations instead.
+
+Every reservation write on SQLite first bumps the org's row in
+org_reservation_versions, which also takes the database's write lock. The
+writer then checks against a tree at exactly the previous version, reloading
+it inside its transaction when another worker or process wrote in between,
+and applies its own change to the tree after committing. Reads compare the
+stored version and reload when the tree is behind.
+
+Converted reservations leave both the constraint and the tree; from then on the
+active checkout they became holds the asset, and new reservations and pickups
+are checked against checkouts with the same predicate availability uses.
+"""
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from app.core.cache import LRUCache, MISSING
+from app.core.intervals import IntervalTree
+from app.core.sync import dialect_insert
+from app.models.asset import Asset
+from app.models.assignment import Assignment
+from app.models.reservation import Reservation, OrgReservationVersion
+
+RESERVATION_INDEX_ORGS = int(os.getenv("RESERVATION_INDEX_ORGS", "200"))
+EXCLUSION_VIOLATION = "23P01"
+
+
+class Span(NamedTuple):
+    reservation_id: int
+    asset_id: int
+    starts_at: datetime
+    ends_at: datetime
+
+
+def as_utc(value: datetime) -> datetime:
+    """SQLite hands back naive datetimes; everything here compares aware UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def uses_interval_index(db: Session) -> bool:
+    return db.get_bind().dialect.name != "postgresql"
+
+
+def is_exclusion_violation(error: Exception) -> bool:
+    return getattr(getattr(error, "orig", None), "sqlstate", None) == EXCLUSION_VIOLATION
+
+
+class _OrgIntervals:
+    def __init__(self, version: int, spans: Iterable[Span]):
+        self.version = version
+        self.spans: Dict[int, Span] = {s.reservation_id: s for s in spans}
+        self.tree = IntervalTree((s.starts_at, s.ends_at, s.reservation_id) for s in self.spans.values())
+
+    def add(self, span: Span):
+        if span.reservation_id not in self.spans:
+            self.spans[span.reservation_id] = span
+            self.tree.add(span.starts_at, span.ends_at, span.reservation_id)
+
+    def remove(self, reservation_id: int):
+        span = self.spans.pop(reservation_id, None)
+        if span is not None:
+            self.tree.remove(span.starts_at, reservation_id)
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Span]:
+        return [self.spans[key] for _, _, key in self.tree.overlapping(start, end)]
+
+
+class ReservationIndex:
+    def __init__(self, maxsize: int = RESERVATION_INDEX_ORGS):
+        self._orgs = LRUCache(maxsize=maxsize)
+        # Trees are mutated in place; one lock covers lookups, updates and queries.
+        self._lock = threading.Lock()
+
+    def bump_version(self, db: Session, org_id: str) -> int:
+        """Starts a reservation write for the org; returns the version it will commit as."""
+        insert = dialect_insert(db.get_bind().dialect.name)
+        stmt = insert(OrgReservationVersion).values(org_id=org_id, version=1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OrgReservationVersion.org_id],
+            set_={"version": OrgReservationVersion.version + 1}
+        ).returning(OrgReservationVersion.version)
+        return db.connection().execute(stmt).scalar_one()
+
+    def _load(self, db: Session, org_id: str, version: int) -> _OrgIntervals:
+        rows = db.execute(
+            select(Reservation.id, Reservation.asset_id, Reservation.starts_at, Reservation.ends_at)
+            .where(Reservation.org_id == org_id, Reservation.status == "Reserved")
+        ).all()
+        entry = _OrgIntervals(version, (Span(r.id, r.asset_id, as_utc(r.starts_at), as_utc(r.ends_at)) for r in rows))
+        with self._lock:
+            cached = self._orgs.get(org_id)
+            if cached is MISSING or cached.version < version:
+                self._orgs.set(org_id, entry)
+        return entry
+
+    def _current(self, db: Session, org_id: str, version: int) -> _OrgIntervals:
+        with self._lock:
+            cached = self._orgs.get(org_id)
+        if cached is not MISSING and cached.version == version:
+            return cached
+        return self._load(db, org_id, version)
+
+    def conflicts(self, db: Session, org_id: str, version: int, asset_id: int,
+                  start: datetime, end: datetime, exclude_id: Optional[int] = None) -> List[Span]:
+        """Live reservations of the asset overlapping [start, end), as committed before ``version``."""
+        entry = self._current(db, org_id, version - 1)
+        with self._lock:
+            found = entry.overlapping(start, end)
+        return [s for s in found if s.asset_id == asset_id and s.reservation_id != exclude_id]
+
+    def committed(self, org_id: str, version: int, added: Iterable[Span] = (), removed: Iterable[int] = ()):
+        """Applies a committed write to the cached tree, if the tree was at the version before it."""
+        with self._lock:
+            cached = self._orgs.get(org_id)
+            if cached is MISSING or cached.version >= version:
+                return
+            if cached.version != version - 1:
+                self._orgs.delete(org_id)
+                return
+            for span in added:
+                cached.add(span)
+            for reservation_id in removed:
+                cached.remove(reservation_id)
+            cached.version = version
+
+    def reserved_asset_ids(self, db: Session, org_id: str, start: datetime, end: datetime) -> Set[int]:
+        version = db.execute(
+            select(OrgReservationVersion.version).where(OrgReservationVersion.org_id == org_id)
+        ).scalar() or 0
+        entry = self._current(db, org_id, version)
+        with self._lock:
+            return {s.asset_id for s in entry.overlapping(start, end)}
+
+    def stats(self) -> dict:
+        return self._orgs.stats()
+
+
+reservation_index = ReservationIndex()
+
+
+def overlapping_reservations(db: Session, org_id: str, asset_id: int,
+                             start: datetime, end: datetime) -> List[Reservation]:
+    """SQL version of the conflict check, for reporting what the exclusion constraint refused."""
+    return db.query(Reservation).filter(
+        Reservation.org_id == org_id,
+        Reservation.asset_id == asset_id,
+        Reservation.status == "Reserved",
+        Reservation.starts_at < end,
+        Reservation.ends_at > start,
+    ).order_by(Reservation.starts_at).all()
+
+
+def reserved_asset_ids(db: Session, org_id: str, start: datetime, end: datetime) -> Set[int]:
+    if uses_interval_index(db):
+        return reservation_index.reserved_asset_ids(db, org_id, start, end)
+    period = func.tstzrange(Reservation.starts_at, Reservation.ends_at)
+    rows = db.execute(
+        select(Reservation.asset_id).distinct()
+        .where(Reservation.org_id == org_id, Reservation.status == "Reserved",
+               period.op("&&")(func.tstzrange(start, end)))
+    ).scalars()
+    return set(rows)
+
+
+def _checkout_overlaps(org_id: str, start: datetime, end: datetime):
+    """Active checkouts holding their asset during [start, end): no return date, or not due back by ``start``."""
+    return (
+        Assignment.org_id == org_id,
+        Assignment.status == "Active",
+        Assignment.checked_out_at < end,
+        (Assignment.expected_return_at.is_(None)) | (Assignment.expected_return_at > start),
+    )
+
+
+def checkout_during(db: Session, org_id: str, asset_id: int,
+                    start: datetime, end: datetime) -> Optional[Assignment]:
+    """
+    The active checkout of the asset overlapping [start, end), if any. Converted
+    reservations leave the interval index, so this is what keeps their window booked.
+    """
+    return db.query(Assignment).filter(
+        Assignment.asset_id == asset_id, *_checkout_overlaps(org_id, start, end)
+    ).first()
+
+
+def available_asset_ids(db: Session, org_id: str, start: datetime, end: datetime) -> List[int]:
+    """
+    Assets free for all of [start, end): not retired, not reserved in the window,
+    and not checked out unless due back by ``start``.
+    """
+    busy = reserved_asset_ids(db, org_id, start, end)
+    out = db.execute(select(Assignment.asset_id).where(*_checkout_overlaps(org_id, start, end))).scalars()
+    busy.update(out)
+    assets = db.execute(
+        select(Asset.id).where(Asset.org_id == org_id, Asset.status != "Retired").order_by(Asset.id)
+    ).scalars()
+    return [asset_id for asset_id in assets if asset_id not in busy]
+
+
+def span_of(reservation: Reservation) -> Span:
+    return Span(reservation.id, reservation.asset_id, as_utc(reservation.starts_at), as_utc(reservation.ends_at))
@@ -0,0 +1,106 @@
+"""
+Daily activity counts per (org, UTC day, event_type), backing
+GET /reports/activity-trends so trend queries read O(days) rows, not O(events).
+
+Every flush that inserts ActivityLog rows upserts the matching counters in the
+same transaction, so rollups commit or roll back together with the events.
+Rows written around the ORM (bulk loads, manual SQL) are picked up by rebuilding:
+
+    python -m app.core.rollups backfill [--org ORG_ID] [--days N]
+
+A rebuild replaces the affected rollup rows from activity_logs; run it while
+the org is quiet, since events flushed mid-rebuild can be counted twice.
+"""
+import argparse
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import event, select, delete, insert, func, cast, Date
+from sqlalchemy.engine import Connection
+from app.core.db import SessionLocal
+from app.core.sync import dialect_insert
+from app.models.activity import ActivityLog, ActivityDailyRollup
+
+
+def utc_day(value: Optional[datetime]) -> date:
+    if value is None:
+        return datetime.now(timezone.utc).date()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def _day_expression(dialect_name: str):
+    if dialect_name == "postgresql":
+        return cast(func.timezone("UTC", ActivityLog.created_at), Date)
+    # SQLite's date() normalises any offset to UTC.
+    return func.date(ActivityLog.created_at)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _roll_up_activity(session, flush_context):
+    counts = Counter(
+        (obj.org_id, utc_day(obj.created_at), obj.event_type)
+        for obj in session.new if isinstance(obj, ActivityLog)
+    )
+    if not counts:
+        return
+    conn = session.connection()
+    insert_ = dialect_insert(conn.dialect.name)
+    # Sorted so concurrent transactions lock counter rows in the same order.
+    for (org_id, day, event_type), n in sorted(counts.items()):
+        conn.execute(
+            insert_(ActivityDailyRollup)
+            .values(org_id=org_id, day=day, event_type=event_type, count=n)
+            .on_conflict_do_update(
+                index_elements=[ActivityDailyRollup.org_id, ActivityDailyRollup.day, ActivityDailyRollup.event_type],
+                set_={"count": ActivityDailyRollup.count + n},
+            )
+        )
+
+
+def rebuild_rollups(conn: Connection, org_id: Optional[str] = None, days: Optional[int] = None) -> int:
+    """Recomputes rollups from activity_logs; returns the number of rollup rows written."""
+    day = _day_expression(conn.dialect.name)
+    since = datetime.now(timezone.utc).date() - timedelta(days=days) if days is not None else None
+
+    clear = delete(ActivityDailyRollup)
+    source = select(ActivityLog.org_id, day, ActivityLog.event_type, func.count())
+    if org_id:
+        clear = clear.where(ActivityDailyRollup.org_id == org_id)
+        source = source.where(ActivityLog.org_id == org_id)
+    if since is not None:
+        clear = clear.where(ActivityDailyRollup.day >= since)
+        # Compare on the full timestamp so the activity_logs index stays usable.
+        source = source.where(ActivityLog.created_at >= datetime.combine(since, datetime.min.time(), timezone.utc))
+    source = source.group_by(ActivityLog.org_id, day, ActivityLog.event_type)
+
+    conn.execute(clear)
+    result = conn.execute(
+        insert(ActivityDailyRollup).from_select(["org_id", "day", "event_type", "count"], source)
+    )
+    return result.rowcount
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.core.rollups")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill = commands.add_parser("backfill", help="rebuild daily activity rollups from activity_logs")
+    backfill.add_argument("--org", default=None, help="only this org (default: all)")
+    backfill.add_argument("--days", type=int, default=None, help="only the last N days (default: all history)")
+    args = parser.parse_args(argv)
+
+    from app.core.shards import create_tables, engine_for_org, map_shards
+    create_tables()
+
+    def rebuild(engine):
+        with engine.begin() as conn:
+            return rebuild_rollups(conn, args.org, args.days)
+
+    # Each shard rolls up its own orgs' activity.
+    rows = rebuild(engine_for_org(args.org)) if args.org else sum(map_shards(rebuild).values())
+    print(f"Rebuilt {rows} rollup rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+In-place upgrades for databases created by an earlier version.
+
+create_all only creates missing tables; it never alters existing ones. Columns
+and indexes added to tables that already existed are added here, on every shard
+at startup (see app.core.shards.create_tables). Each step checks first, so
+re-running is a no-op.
+"""
+import logging
+from sqlalchemy import bindparam, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from app.core.sync import dialect_insert
+from app.models.activity import ActivityLog
+from app.models.asset import Asset
+from app.models.assignment import Assignment
+from app.models.incident import Incident
+from app.models.sync import OrgChangeSequence
+
+logger = logging.getLogger(__name__)
+
+SEED_BATCH_SIZE = 1000
+
+# Tables that predate create_tables; indexes declared on them later are created here.
+EXISTING_TABLES = [Asset.__table__, Assignment.__table__, ActivityLog.__table__, Incident.__table__]
+
+
+def _columns(conn: Connection, table: str):
+    return {c["name"] for c in inspect(conn).get_columns(table)}
+
+
+def _seed_change_seqs(conn: Connection):
+    """Numbers existing assets per org (by id) so the delta feed sees them, and moves each counter past them."""
+    assets = Asset.__table__
+    counters = dict(conn.execute(select(OrgChangeSequence.org_id, OrgChangeSequence.last_seq)).all())
+    stamp = update(assets).where(assets.c.id == bindparam("asset_id")).values(change_seq=bindparam("seq"))
+    batch, last = [], dict(counters)
+    for asset_id, org_id in conn.execute(select(assets.c.id, assets.c.org_id).order_by(assets.c.org_id, assets.c.id)):
+        last[org_id] = last.get(org_id, 0) + 1
+        batch.append({"asset_id": asset_id, "seq": last[org_id]})
+        if len(batch) >= SEED_BATCH_SIZE:
+            conn.execute(stamp, batch)
+            batch = []
+    if batch:
+        conn.execute(stamp, batch)
+
+    upsert = dialect_insert(conn.dialect.name)
+    for org_id, seq in last.items():
+        if seq != counters.get(org_id):
+            stmt = upsert(OrgChangeSequence).values(org_id=org_id, last_seq=seq)
+            conn.execute(stmt.on_conflict_do_update(index_elements=[OrgChangeSequence.org_id], set_={"last_seq": seq}))
+
+
+def _add_asset_change_seq(conn: Connection):
+    if "change_seq" in _columns(conn, "assets"):
+        return
+    logger.info("Upgrading assets: adding change_seq")
+    conn.execute(text("ALTER TABLE assets ADD COLUMN change_seq BIGINT NOT NULL DEFAULT 0"))
+    _seed_change_seqs(conn)
+
+
+def _create_missing_indexes(conn: Connection):
+    inspector = inspect(conn)
+    for table in EXISTING_TABLES:
+        present = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name not in present:
+                logger.info("Upgrading %s: creating index %s", table.name, index.name)
+                index.create(conn)
+
+
+def upgrade_schema(engine: Engine):
+    with engine.begin() as conn:
+        _add_asset_change_seq(conn)
+        # After the columns, since the new indexes may cover them.
+        _create_missing_indexes(conn)
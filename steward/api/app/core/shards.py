@@ -0,0 +1,232 @@
+"""
+Org-to-database sharding.
+
+Every org lives on exactly one shard. DATABASE_URL is the "default" shard;
+DATABASE_SHARDS adds more (``big=postgres://...,eu=postgres://...``). Orgs
+not listed in the org_shards directory (on the default shard) live on the
+default shard, so with no extra shards configured nothing is ever looked up.
+
+Placements are cached per worker for SHARD_MAP_TTL_SECONDS. Moving an org:
+
+    python -m app.core.shards move org_123 big
+
+marks the org as moving (every route on get_db gets 503, get_read_db reads
+continue), waits out the cache TTL, copies its rows with their ids into the
+target in one transaction, switches the directory, waits again so no worker
+still reads the old copy, then deletes the source rows. It aborts without changes if the target already
+has rows for the org or any of its ids. Ids are preserved, so give each shard
+a disjoint id range (setval on its sequences) before moving orgs between them.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, TypeVar
+from sqlalchemy import Integer, select, insert, delete, func, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.cache import LRUCache, MISSING
+from app.core.db import Base, SessionLocal, DEFAULT_SHARD, engine, shard_engines
+from app.core.schema import upgrade_schema
+from app.core.sync import dialect_insert
+from app.models.shard import OrgShard
+
+SHARD_MAP_TTL_SECONDS = float(os.getenv("SHARD_MAP_TTL_SECONDS", "30"))
+SHARD_MAP_CACHE_SIZE = int(os.getenv("SHARD_MAP_CACHE_SIZE", "10000"))
+MOVE_BATCH_SIZE = 1000
+
+T = TypeVar("T")
+
+
+class Placement(NamedTuple):
+    shard: str
+    moving: bool = False
+
+
+DEFAULT_PLACEMENT = Placement(DEFAULT_SHARD)
+
+_placements = LRUCache(maxsize=SHARD_MAP_CACHE_SIZE, ttl=SHARD_MAP_TTL_SECONDS)
+
+
+class MoveConflict(Exception):
+    pass
+
+
+def _load_placement(org_id: str) -> Placement:
+    with engine.connect() as conn:
+        row = conn.execute(select(OrgShard.shard, OrgShard.moving).where(OrgShard.org_id == org_id)).first()
+    if row is None:
+        return DEFAULT_PLACEMENT
+    if row.shard not in shard_engines:
+        raise RuntimeError(f"Org {org_id} is placed on shard {row.shard!r}, which is not in DATABASE_SHARDS")
+    return Placement(row.shard, bool(row.moving))
+
+
+def placement_for_org(org_id: Optional[str]) -> Placement:
+    if not org_id or len(shard_engines) == 1:
+        return DEFAULT_PLACEMENT
+    placement = _placements.get(org_id)
+    if placement is MISSING:
+        placement = _load_placement(org_id)
+        _placements.set(org_id, placement)
+    return placement
+
+
+def engine_for_org(org_id: Optional[str]) -> Engine:
+    return shard_engines[placement_for_org(org_id).shard]
+
+
+def session_for_org(org_id: Optional[str]) -> Session:
+    """A primary session on the org's shard, for work outside get_db."""
+    return SessionLocal(bind=engine_for_org(org_id))
+
+
+def map_engines(fn: Callable[[Engine], T], engines: List[Engine]) -> List[T]:
+    """Runs fn against each engine concurrently; raises the first failure after all have finished."""
+    if len(engines) == 1:
+        return [fn(engines[0])]
+    with ThreadPoolExecutor(max_workers=len(engines), thread_name_prefix="shard") as pool:
+        futures = [pool.submit(fn, e) for e in engines]
+    return [f.result() for f in futures]
+
+
+def map_shards(fn: Callable[[Engine], T]) -> Dict[str, T]:
+    """Runs fn(engine) on every shard in parallel, for jobs that span all orgs."""
+    return dict(zip(shard_engines, map_engines(fn, list(shard_engines.values()))))
+
+
+def create_tables():
+    # The directory only exists on the default shard.
+    org_tables = [t for t in Base.metadata.sorted_tables if t.name != OrgShard.__tablename__]
+    for name, shard in shard_engines.items():
+        Base.metadata.create_all(bind=shard, tables=None if name == DEFAULT_SHARD else org_tables)
+        upgrade_schema(shard)
+
+
+def _set_placement(org_id: str, shard: str, moving: bool):
+    upsert = dialect_insert(engine.dialect.name)
+    stmt = upsert(OrgShard).values(org_id=org_id, shard=shard, moving=moving)
+    stmt = stmt.on_conflict_do_update(index_elements=[OrgShard.org_id], set_={"shard": shard, "moving": moving})
+    with engine.begin() as conn:
+        conn.execute(stmt)
+    _placements.delete(org_id)
+
+
+def _org_tables():
+    # Parents before children, so foreign keys hold while copying.
+    return [t for t in Base.metadata.sorted_tables if "org_id" in t.c and t.name != OrgShard.__tablename__]
+
+
+def _integer_id(table):
+    pk = list(table.primary_key.columns)
+    return pk[0] if len(pk) == 1 and isinstance(pk[0].type, Integer) else None
+
+
+def _sync_sequences(conn, tables):
+    if conn.dialect.name != "postgresql":
+        return
+    for table in tables:
+        column = _integer_id(table)
+        if column is not None:
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', '{column.name}'), "
+                f"(SELECT COALESCE(MAX({column.name}), 1) FROM {table.name}))"
+            ))
+
+
+def _check_target(conn, org_id: str, target: str, tables):
+    for table in tables:
+        if conn.execute(select(func.count()).select_from(table).where(table.c.org_id == org_id)).scalar():
+            raise MoveConflict(f"{table.name} on shard {target!r} already has rows for {org_id}")
+
+
+def move_org(org_id: str, target: str, wait: float = SHARD_MAP_TTL_SECONDS,
+             batch_size: int = MOVE_BATCH_SIZE, log=print) -> Dict[str, int]:
+    """Moves every org_id-scoped row of the org to ``target``; returns rows copied per table."""
+    if target not in shard_engines:
+        raise ValueError(f"Unknown shard {target!r}; configured: {', '.join(shard_engines)}")
+    placement = _load_placement(org_id)
+    if placement.moving:
+        raise MoveConflict(f"{org_id} is already being moved; clear org_shards.moving if that move died")
+    if placement.shard == target:
+        raise ValueError(f"{org_id} is already on shard {target!r}")
+
+    source_engine, target_engine = shard_engines[placement.shard], shard_engines[target]
+    tables = _org_tables()
+    with target_engine.connect() as conn:
+        _check_target(conn, org_id, target, tables)
+
+    _set_placement(org_id, placement.shard, moving=True)
+    log(f"{org_id}: writes paused, waiting {wait:.0f}s for workers to notice")
+    time.sleep(wait)
+
+    copied = {}
+    try:
+        with source_engine.connect() as src, target_engine.begin() as dst:
+            for table in tables:
+                column = _integer_id(table)
+                stmt = select(table).where(table.c.org_id == org_id)
+                if column is not None:
+                    stmt = stmt.order_by(column)
+                result = src.execution_options(stream_results=True, yield_per=batch_size).execute(stmt)
+                count = 0
+                for rows in result.partitions():
+                    batch = [dict(row._mapping) for row in rows]
+                    if column is not None:
+                        clash = dst.execute(
+                            select(column).where(column.in_([r[column.name] for r in batch])).limit(1)
+                        ).scalar()
+                        if clash is not None:
+                            raise MoveConflict(f"{table.name} id {clash} already exists on shard {target!r}")
+                    dst.execute(insert(table), batch)
+                    count += len(batch)
+                copied[table.name] = count
+            _sync_sequences(dst, tables)
+    except IntegrityError as e:
+        _set_placement(org_id, placement.shard, moving=False)
+        raise MoveConflict(f"Copy to shard {target!r} violated a constraint: {e.orig}") from e
+    except BaseException:
+        _set_placement(org_id, placement.shard, moving=False)
+        raise
+
+    _set_placement(org_id, target, moving=False)
+    log(f"{org_id}: now on {target!r}; waiting {wait:.0f}s before deleting it from {placement.shard!r}")
+    time.sleep(wait)
+    with source_engine.begin() as conn:
+        for table in reversed(tables):
+            conn.execute(delete(table).where(table.c.org_id == org_id))
+    return copied
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.core.shards")
+    commands = parser.add_subparsers(dest="command", required=True)
+    where = commands.add_parser("where", help="print the shard an org lives on")
+    where.add_argument("org")
+    move = commands.add_parser("move", help="move an org's rows to another shard")
+    move.add_argument("org")
+    move.add_argument("target", help="shard name (default, or a name from DATABASE_SHARDS)")
+    move.add_argument("--wait", type=float, default=SHARD_MAP_TTL_SECONDS,
+                      help="seconds for workers to see each placement change (0 if the API is stopped)")
+    move.add_argument("--batch-size", type=int, default=MOVE_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    # Register every table before looking for org-scoped ones.
+    from app.models import activity, asset, assignment, idempotency, incident, reservation, sync  # noqa: F401
+    create_tables()
+    if args.command == "where":
+        placement = _load_placement(args.org)
+        print(f"{args.org}: {placement.shard}{' (moving)' if placement.moving else ''}")
+        return
+    try:
+        copied = move_org(args.org, args.target, wait=args.wait, batch_size=args.batch_size)
+    except (MoveConflict, ValueError) as e:
+        raise SystemExit(f"Move aborted: {e}")
+    for table, count in copied.items():
+        print(f"  {table}: {count} rows")
+    print(f"Moved {args.org} to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
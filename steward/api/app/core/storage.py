@@ -0,0 +1,76 @@
+"""
+Object storage for uploaded files. Callers address objects by key and get back
+a URL for clients; OBJECT_STORE_BACKEND picks the implementation.
+
+The local backend writes under MEDIA_ROOT and index.py serves that directory at
+MEDIA_BASE_URL. It is meant for development and tests; keys are content
+addressed, so a URL is only known to someone who has been given it.
+"""
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO
+
+OBJECT_STORE_BACKEND = os.getenv("OBJECT_STORE_BACKEND", "local")
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "./media")
+MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", "/media")
+
+
+class ObjectStore(ABC):
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def put_file(self, key: str, fileobj: BinaryIO, content_type: str):
+        ...
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        ...
+
+
+class LocalObjectStore(ObjectStore):
+    def __init__(self, root: str = MEDIA_ROOT, base_url: str = MEDIA_BASE_URL):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put_file(self, key: str, fileobj: BinaryIO, content_type: str):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers never see a partial object.
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(fileobj, out)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+_store = None
+
+
+def get_object_store() -> ObjectStore:
+    global _store
+    if _store is None:
+        if OBJECT_STORE_BACKEND == "local":
+            _store = LocalObjectStore()
+        else:
+            raise RuntimeError(f"Unknown OBJECT_STORE_BACKEND: {OBJECT_STORE_BACKEND}")
+    return _store
@@ -0,0 +1,80 @@
+"""
+Assignment event tags. Each tag is also stored as a row in assignment_tags so
+tag filters and GET /assignments/tags use an index instead of scanning the
+event_tags JSON. Assignments written before assignment_tags existed have no tag
+rows until they are backfilled:
+
+    python -m app.core.tags backfill [--org ORG_ID]
+
+Safe to re-run and to run while the API is serving: assignments that already
+have tag rows are skipped.
+"""
+import argparse
+from typing import List, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.assignment import Assignment, AssignmentTag
+
+
+def normalize_tags(tags: Optional[List[str]]) -> List[str]:
+    """Trim, drop empties and de-duplicate while keeping the caller's order."""
+    seen = []
+    for tag in tags or []:
+        tag = (tag or "").strip()
+        if tag and tag not in seen:
+            seen.append(tag)
+    return seen
+
+
+def backfill_assignment_tags(db: Session, org_id: Optional[str] = None, batch_size: int = 5000) -> int:
+    """Populates assignment_tags from Assignment.event_tags for rows that have none; returns the tag rows written."""
+    has_tags = select(AssignmentTag.assignment_id)
+    written = 0
+    last_id = 0
+    while True:
+        query = db.query(Assignment.id, Assignment.org_id, Assignment.event_tags).filter(
+            Assignment.id > last_id,
+            Assignment.event_tags.isnot(None),
+            Assignment.id.notin_(has_tags)
+        )
+        if org_id:
+            query = query.filter(Assignment.org_id == org_id)
+        batch = query.order_by(Assignment.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        for assignment_id, assignment_org, event_tags in batch:
+            for tag in normalize_tags(event_tags):
+                db.add(AssignmentTag(org_id=assignment_org, assignment_id=assignment_id, tag=tag))
+                written += 1
+        db.commit()
+        last_id = batch[-1][0]
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.core.tags")
+    commands = parser.add_subparsers(dest="command", required=True)
+    backfill = commands.add_parser("backfill", help="fill assignment_tags for assignments written before it existed")
+    backfill.add_argument("--org", default=None, help="only this org (default: all)")
+    backfill.add_argument("--batch-size", type=int, default=5000, help="assignments per commit")
+    args = parser.parse_args(argv)
+
+    from app.core.db import SessionLocal
+    from app.core.shards import create_tables, engine_for_org, map_shards
+    create_tables()
+
+    def run(engine):
+        db = SessionLocal(bind=engine)
+        try:
+            return backfill_assignment_tags(db, args.org, args.batch_size)
+        finally:
+            db.close()
+
+    # Each shard backfills its own orgs' assignments.
+    written = run(engine_for_org(args.org)) if args.org else sum(map_shards(run).values())
+    print(f"Wrote {written} assignment tag rows")
+
+
+if __name__ == "__main__":
+    main()
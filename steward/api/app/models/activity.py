@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, JSON, Index
 from sqlalchemy.sql import func
 from app.core.db import Base
 
@@ -17,3 +17,19 @@ class ActivityLog(Base):
     details = Column(JSON, nullable=True) # { "previous_status": "...", "new_status": "..." }
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Fetch created_at during the INSERT so the live feed can publish it without a reload
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        Index("ix_activity_logs_asset_created", "asset_id", "created_at"),
+    )
+
+class ActivityDailyRollup(Base):
+    """Per-org daily event counts, kept in step with activity_logs by app.core.rollups."""
+    __tablename__ = "activity_daily_rollups"
+
+    org_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)  # UTC
+    event_type = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
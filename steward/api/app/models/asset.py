@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, Boolean, Index
 from sqlalchemy.sql import func
 from app.core.db import Base
 
@@ -21,3 +21,10 @@ class Asset(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Per-org change sequence stamped on every write; drives GET /assets/changes
+    change_seq = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_assets_org_change_seq", "org_id", "change_seq"),
+    )
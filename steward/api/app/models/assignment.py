@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.db import Base
@@ -24,3 +24,22 @@ class Assignment(Base):
     
     # Relationships
     asset = relationship("Asset", backref="assignments")
+
+    __table_args__ = (
+        Index("ix_assignments_asset_checked_out", "asset_id", "checked_out_at"),
+        Index("ix_assignments_org_assigned_to", "org_id", "assigned_to"),
+    )
+
+class AssignmentTag(Base):
+    """One row per (assignment, tag); mirrors Assignment.event_tags so tags can be filtered and counted in SQL."""
+    __tablename__ = "assignment_tags"
+
+    id = Column(Integer, primary_key=True, index=True)
+    org_id = Column(String, nullable=False)
+    assignment_id = Column(Integer, ForeignKey("assignments.id", ondelete="CASCADE"), nullable=False, index=True)
+    tag = Column(String, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("assignment_id", "tag", name="uq_assignment_tags_assignment_tag"),
+        Index("ix_assignment_tags_org_tag", "org_id", "tag", "assignment_id"),
+    )
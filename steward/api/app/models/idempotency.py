@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, JSON, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.db import Base
+
+class IdempotencyRecord(Base):
+    """One row per (org, Idempotency-Key); see app.core.idempotency."""
+    __tablename__ = "idempotency_keys"
+
+    id = Column(Integer, primary_key=True)
+    org_id = Column(String, nullable=False)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # sha256 of method, path and body
+
+    status = Column(String, nullable=False, default="in_progress")  # in_progress, completed
+    locked_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    response_status = Column(Integer, nullable=True)
+    response_headers = Column(JSON, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("org_id", "key", name="uq_idempotency_keys_org_key"),
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.db import Base
@@ -25,3 +25,7 @@ class Incident(Base):
 
     # Relationships
     asset = relationship("Asset", backref="incidents")
+
+    __table_args__ = (
+        Index("ix_incidents_asset_created", "asset_id", "created_at"),
+    )
@@ -0,0 +1,61 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Text, JSON, Index, DDL, event
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
+from sqlalchemy.sql import func, text
+from sqlalchemy.orm import relationship
+from app.core.db import Base
+
+class Reservation(Base):
+    """A future booking of an asset for [starts_at, ends_at); becomes an Assignment when converted."""
+    __tablename__ = "reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    org_id = Column(String, nullable=False)
+
+    asset_id = Column(Integer, ForeignKey("assets.id"), nullable=False)
+    reserved_for = Column(String, nullable=False)  # Clerk User ID
+    reserved_by = Column(String, nullable=False)  # Clerk User ID
+
+    starts_at = Column(DateTime(timezone=True), nullable=False)
+    ends_at = Column(DateTime(timezone=True), nullable=False)
+
+    status = Column(String, nullable=False, default="Reserved")  # Reserved, Converted, Cancelled
+    notes = Column(Text, nullable=True)
+    event_tags = Column(JSON, nullable=True)
+    assignment_id = Column(Integer, ForeignKey("assignments.id"), nullable=True)  # set on conversion
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    asset = relationship("Asset")
+
+    __table_args__ = (
+        Index("ix_reservations_org_asset_starts", "org_id", "asset_id", "starts_at"),
+        Index("ix_reservations_org_starts", "org_id", "starts_at"),
+        # Postgres refuses overlapping live reservations of one asset itself, using
+        # a GiST index on (asset_id, period); SQLite goes through app/core/reservations.py.
+        ExcludeConstraint(
+            (asset_id, "="),
+            (func.tstzrange(starts_at, ends_at), "&&"),
+            name="ex_reservations_asset_period",
+            using="gist",
+            where=text("status = 'Reserved'"),
+        ).ddl_if(dialect="postgresql"),
+        # Serves availability queries ("which assets are free between X and Y").
+        Index(
+            "ix_reservations_org_period", "org_id", func.tstzrange(starts_at, ends_at),
+            postgresql_using="gist", postgresql_where=text("status = 'Reserved'"),
+        ).ddl_if(dialect="postgresql"),
+    )
+
+class OrgReservationVersion(Base):
+    """Bumped by every reservation write on SQLite so per-process interval indexes know when they are stale."""
+    __tablename__ = "org_reservation_versions"
+
+    org_id = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+# GiST can only index "asset_id =" with the btree_gist extension.
+event.listen(
+    Reservation.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy.sql import func
+from app.core.db import Base
+
+class OrgShard(Base):
+    """Directory of orgs placed off the default shard; lives on the default shard only."""
+    __tablename__ = "org_shards"
+
+    org_id = Column(String, primary_key=True)
+    shard = Column(String, nullable=False)
+    # Set while app.core.shards moves the org: reads continue, writes get 503.
+    moving = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.db import Base
+
+class OrgChangeSequence(Base):
+    __tablename__ = "org_change_sequences"
+
+    org_id = Column(String, primary_key=True)
+    last_seq = Column(BigInteger, nullable=False, default=0)
+
+class AssetTombstone(Base):
+    __tablename__ = "asset_tombstones"
+
+    id = Column(Integer, primary_key=True, index=True)
+    org_id = Column(String, nullable=False)
+    asset_id = Column(Integer, nullable=False)
+    change_seq = Column(BigInteger, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_asset_tombstones_org_change_seq", "org_id", "change_seq"),
+    )
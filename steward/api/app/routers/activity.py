@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.core.debs import get_db
+from app.core.shards import session_for_org
+from app.core.debs import get_read_db
+from app.core.events import broker, serialize_activity, OVERFLOW
 from app.core.security import clerk_guard
 from app.models.activity import ActivityLog
 from app.schemas.activity import ActivityLogResponse
@@ -11,10 +18,11 @@ router = APIRouter()
 
 from datetime import datetime, timedelta
 from app.core.billing import get_org_plan, PlanLimits
+from app.core.ratelimit import rate_limit
 
-@router.get("", response_model=List[ActivityLogResponse])
+@router.get("", response_model=List[ActivityLogResponse], dependencies=[Depends(rate_limit(2))])
 async def get_activity_logs(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     org_id: str = Depends(get_org_id),
     skip: int = 0,
     limit: int = 50,
@@ -38,3 +46,90 @@ async def get_activity_logs(
         query = query.filter(ActivityLog.event_type == event_type)
         
     return query.order_by(ActivityLog.created_at.desc()).offset(skip).limit(limit).all()
+
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_RESUME_LIMIT = 500
+
+def _load_activity_since(org_id: str, last_id: int, limit: int) -> List[dict]:
+    db = session_for_org(org_id)
+    try:
+        rows = db.query(ActivityLog).filter(
+            ActivityLog.org_id == org_id,
+            ActivityLog.id > last_id
+        ).order_by(ActivityLog.id).limit(limit).all()
+        return [serialize_activity(row) for row in rows]
+    finally:
+        db.close()
+
+def _latest_activity_id(org_id: str) -> int:
+    db = session_for_org(org_id)
+    try:
+        return db.query(func.max(ActivityLog.id)).filter(ActivityLog.org_id == org_id).scalar() or 0
+    finally:
+        db.close()
+
+def _sse(item: dict) -> str:
+    return f"id: {item['id']}\nevent: activity\ndata: {json.dumps(item, default=str)}\n\n"
+
+@router.get("/stream", dependencies=[Depends(rate_limit(2))])
+async def stream_activity(
+    request: Request,
+    org_id: str = Depends(get_org_id),
+    last_event_id: Optional[str] = Header(None),
+    since_id: Optional[int] = None,
+    _: bool = Depends(require_admin)
+):
+    """
+    Server-Sent Events feed of the org's new activity. Reconnecting clients send
+    Last-Event-ID (EventSource does this automatically) or ?since_id= and first
+    receive what they missed. An ``overflow`` event means the client fell behind
+    and should reconnect; a ``reset`` event means the gap was too large to replay
+    and it should reload GET /activity instead.
+    """
+    resume_from = since_id
+    if last_event_id:
+        try:
+            resume_from = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    async def events():
+        # Subscribe before reading the backlog so nothing committed in between is lost;
+        # anything delivered twice is skipped by id below.
+        sub = broker.subscribe(org_id)
+        try:
+            yield "retry: 3000\n\n"
+            last_id = resume_from
+            if last_id is not None:
+                backlog = await run_in_threadpool(_load_activity_since, org_id, last_id, STREAM_RESUME_LIMIT + 1)
+                if len(backlog) > STREAM_RESUME_LIMIT:
+                    # The client reloads everything once; carry on from "now" rather
+                    # than replaying the oldest part of the gap.
+                    yield "event: reset\ndata: {}\n\n"
+                    last_id = await run_in_threadpool(_latest_activity_id, org_id)
+                    backlog = []
+                for item in backlog:
+                    yield _sse(item)
+                    last_id = item["id"]
+
+            while True:
+                try:
+                    item = await asyncio.wait_for(sub.queue.get(), STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is OVERFLOW:
+                    yield "event: overflow\ndata: {}\n\n"
+                    return
+                if last_id is not None and item["id"] <= last_id:
+                    continue
+                last_id = item["id"]
+                yield _sse(item)
+        finally:
+            broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,28 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, literal, null, cast, String, JSON, union_all, tuple_, func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from fastapi_clerk_auth import HTTPAuthorizationCredentials
 
-from app.core.debs import get_db
-from app.core.security import clerk_guard
+from app.core.debs import get_db, get_read_db
+from app.core.shards import session_for_org
+from app.core.assetcache import qr_cache
+from app.core.cache import MISSING
+from app.core.security import clerk_guard, get_claim_org_id
 from app.models.asset import Asset
 from app.models.activity import ActivityLog
-from app.schemas.asset import AssetCreate, AssetUpdate, AssetResponse
-from app.core.billing import check_limit
+from app.models.assignment import Assignment
+from app.models.incident import Incident
+from app.schemas.asset import AssetCreate, AssetUpdate, AssetResponse, AssetChanges, QRLookupResult, TimelineEvent, TimelinePage
+from app.core.billing import check_limit, get_org_plan, PlanLimits
+from app.core.ratelimit import rate_limit
+from app.core.sync import current_change_seq, encode_sync_token, decode_sync_token
+from app.models.sync import AssetTombstone
 
 router = APIRouter()
 
 def get_org_id(creds: HTTPAuthorizationCredentials = Depends(clerk_guard)) -> str:
-    claims = creds.decoded
-    
-    # Handle standard and minified Clerk claims
-    org_data = claims.get("org") or claims.get("o")
-    org_id = None
-    
-    if isinstance(org_data, dict):
-        org_id = org_data.get("id")
-    else:
-        org_id = claims.get("org_id")
+    org_id = get_claim_org_id(creds.decoded)
         
     if not org_id:
         raise HTTPException(status_code=400, detail="Missing org_id in token. Please select an organization.")
@@ -51,14 +55,29 @@ def require_admin(creds: HTTPAuthorizationCredentials = Depends(clerk_guard)):
         )
     return True
 
-@router.get("", response_model=List[AssetResponse])
+IDS_BATCH_MAX = 500
+
+def parse_ids(ids: str) -> List[int]:
+    try:
+        parsed = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if len(parsed) > IDS_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {IDS_BATCH_MAX} ids per request")
+    return parsed
+
+@router.get("", response_model=List[AssetResponse], dependencies=[Depends(rate_limit(2))])
 def get_assets(
     status: Optional[str] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    ids: Optional[str] = Query(None, description="Comma-separated asset ids, e.g. 1,2,3; unknown ids are left out"),
+    db: Session = Depends(get_read_db),
     org_id: str = Depends(get_org_id)
 ):
     query = db.query(Asset).filter(Asset.org_id == org_id)
+
+    if ids is not None:
+        query = query.filter(Asset.id.in_(parse_ids(ids))).order_by(Asset.id)
     
     if status:
         query = query.filter(Asset.status == status)
@@ -68,18 +87,7 @@ def get_assets(
         
     return query.all()
 
-@router.post("", response_model=AssetResponse)
-async def create_asset(
-    asset: AssetCreate,
-    db: Session = Depends(get_db),
-    org_id: str = Depends(get_org_id),
-    user_id: str = Depends(get_user_id),
-    _: bool = Depends(require_admin)
-):
-    # Enforce asset limit for organization
-    asset_count = db.query(Asset).filter(Asset.org_id == org_id).count()
-    await check_limit(org_id, asset_count, "max_assets")
-    
+def _insert_asset(db: Session, asset: AssetCreate, org_id: str, user_id: str) -> Asset:
     db_asset = Asset(**asset.model_dump(), org_id=org_id, created_by=user_id)
     db.add(db_asset)
     db.flush() # Get ID
@@ -99,10 +107,135 @@ async def create_asset(
     db.refresh(db_asset)
     return db_asset
 
-@router.get("/{asset_id}", response_model=AssetResponse)
+@router.post("", response_model=AssetResponse, dependencies=[Depends(rate_limit(5))])
+async def create_asset(
+    asset: AssetCreate,
+    db: Session = Depends(get_db),
+    org_id: str = Depends(get_org_id),
+    user_id: str = Depends(get_user_id),
+    _: bool = Depends(require_admin)
+):
+    # Enforce asset limit for organization
+    asset_count = db.query(Asset).filter(Asset.org_id == org_id).count()
+    await check_limit(org_id, asset_count, "max_assets")
+
+    # Off the event loop: on SQLite the write waits for the writer lock.
+    return await run_in_threadpool(_insert_asset, db, asset, org_id, user_id)
+
+QR_BATCH_MAX = 100
+
+def _load_by_qr(org_id: str, codes: List[str]) -> dict:
+    db = session_for_org(org_id)
+    try:
+        rows = db.query(Asset).filter(Asset.org_id == org_id, Asset.qr_code.in_(codes)).all()
+        return {row.qr_code: AssetResponse.model_validate(row) for row in rows}
+    finally:
+        db.close()
+
+async def _lookup_qr_codes(org_id: str, codes: List[str]) -> dict:
+    """Cache first, then one IN query on the unique qr_code index for the misses."""
+    found, misses = {}, []
+    for code in codes:
+        cached = qr_cache.get((org_id, code))
+        if cached is MISSING:
+            misses.append(code)
+        elif cached is not None:
+            found[code] = cached
+
+    if misses:
+        loaded = await run_in_threadpool(_load_by_qr, org_id, misses)
+        for code in misses:
+            # Unknown codes are cached too so a kiosk rescanning a bad label stays off the DB
+            qr_cache.set((org_id, code), loaded.get(code))
+        found.update(loaded)
+    return found
+
+@router.get("/by-qr", response_model=QRLookupResult, dependencies=[Depends(rate_limit(1))])
+async def get_assets_by_qr_codes(
+    codes: List[str] = Query(...),
+    org_id: str = Depends(get_org_id)
+):
+    """Batch variant for multi-scan: ?codes=A&codes=B. Unknown codes come back in ``missing``."""
+    codes = list(dict.fromkeys(codes))
+    if len(codes) > QR_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {QR_BATCH_MAX} codes per request")
+    found = await _lookup_qr_codes(org_id, codes)
+    return QRLookupResult(
+        assets=[found[code] for code in codes if code in found],
+        missing=[code for code in codes if code not in found]
+    )
+
+@router.get("/by-qr/{code}", response_model=AssetResponse, dependencies=[Depends(rate_limit(1))])
+async def get_asset_by_qr_code(
+    code: str,
+    org_id: str = Depends(get_org_id)
+):
+    found = await _lookup_qr_codes(org_id, [code])
+    if code not in found:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return found[code]
+
+SYNC_MAX_LIMIT = 1000
+
+@router.get("/changes", response_model=AssetChanges, dependencies=[Depends(rate_limit(2))])
+def get_asset_changes(
+    since: Optional[str] = None,
+    limit: int = 500,
+    db: Session = Depends(get_read_db),
+    org_id: str = Depends(get_org_id)
+):
+    """
+    Sync feed for offline clients. Without ``since`` it pages through every asset
+    (mode "snapshot"); afterwards each ``next_token`` returns only assets created
+    or updated since, plus ids deleted since, so a reconnect costs O(changes).
+    Keep calling with ``next_token`` while ``has_more`` is true.
+    """
+    mode, seq, after_id = decode_sync_token(since)
+    limit = max(1, min(limit, SYNC_MAX_LIMIT))
+
+    if mode == "snapshot":
+        if seq < 0:
+            # Changes committed after this point are picked up by the delta feed.
+            seq = current_change_seq(db, org_id)
+        rows = db.query(Asset).filter(
+            Asset.org_id == org_id,
+            Asset.id > after_id
+        ).order_by(Asset.id).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_token = encode_sync_token("snapshot", seq, rows[-1].id) if has_more else encode_sync_token("delta", seq)
+        return AssetChanges(mode=mode, assets=rows, next_token=next_token, has_more=has_more)
+
+    # Read the high-water mark first: anything committing later gets a larger number.
+    upper = current_change_seq(db, org_id)
+    rows = db.query(Asset).filter(
+        Asset.org_id == org_id,
+        Asset.change_seq > seq,
+        Asset.change_seq <= upper
+    ).order_by(Asset.change_seq).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more:
+        upper = rows[-1].change_seq
+
+    deleted = [asset_id for (asset_id,) in db.query(AssetTombstone.asset_id).filter(
+        AssetTombstone.org_id == org_id,
+        AssetTombstone.change_seq > seq,
+        AssetTombstone.change_seq <= upper
+    ).order_by(AssetTombstone.change_seq)]
+
+    return AssetChanges(
+        mode=mode,
+        assets=rows,
+        deleted=deleted,
+        next_token=encode_sync_token("delta", upper),
+        has_more=has_more
+    )
+
+@router.get("/{asset_id}", response_model=AssetResponse, dependencies=[Depends(rate_limit(1))])
 def get_asset(
     asset_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     org_id: str = Depends(get_org_id)
 ):
     asset = db.query(Asset).filter(Asset.id == asset_id, Asset.org_id == org_id).first()
@@ -110,7 +243,132 @@ def get_asset(
         raise HTTPException(status_code=404, detail="Asset not found")
     return asset
 
-@router.put("/{asset_id}", response_model=AssetResponse)
+TIMELINE_KINDS = ("activity", "assignment", "incident")
+TIMELINE_MAX_LIMIT = 200
+
+def _encode_cursor(sort_key, kind: str, event_id: int) -> str:
+    if isinstance(sort_key, datetime):
+        sort_key = sort_key.isoformat()
+    raw = json.dumps([sort_key, kind, event_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        sort_key, kind, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if isinstance(sort_key, str):
+            sort_key = datetime.fromisoformat(sort_key)
+        return sort_key, str(kind), int(event_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _timeline_sort_key(column, dialect_name: str):
+    # SQLite keeps timestamps as text in two shapes (server_default now() has no
+    # fractional seconds, Python datetimes do), so compare on julianday() instead.
+    if dialect_name == "sqlite":
+        return func.julianday(column)
+    return column
+
+@router.get("/{asset_id}/timeline", response_model=TimelinePage, dependencies=[Depends(rate_limit(2))])
+async def get_asset_timeline(
+    asset_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    types: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    org_id: str = Depends(get_org_id),
+    _: bool = Depends(require_admin)
+):
+    """
+    Activity, assignment and incident events for one asset, newest first.
+    Pages with an opaque keyset cursor over (time, kind, id) so deep pages
+    cost the same as the first one.
+    """
+    if not db.query(Asset.id).filter(Asset.id == asset_id, Asset.org_id == org_id).first():
+        raise HTTPException(status_code=404, detail="Asset not found")
+
+    kinds = TIMELINE_KINDS
+    if types:
+        kinds = tuple(t.strip() for t in types.split(",") if t.strip())
+        unknown = set(kinds) - set(TIMELINE_KINDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown event types: {', '.join(sorted(unknown))}")
+    limit = max(1, min(limit, TIMELINE_MAX_LIMIT))
+
+    # Enforce history limits
+    plan = await get_org_plan(org_id)
+    limits = PlanLimits(plan)
+    cutoff = None
+    if limits.history_days != float('inf'):
+        cutoff = datetime.now(timezone.utc) - timedelta(days=limits.history_days)
+
+    branches = []
+    if "activity" in kinds:
+        q = select(
+            literal("activity").label("kind"),
+            ActivityLog.id.label("id"),
+            ActivityLog.created_at.label("occurred_at"),
+            ActivityLog.actor_id.label("actor_id"),
+            ActivityLog.event_type.label("event_type"),
+            ActivityLog.asset_name.label("title"),
+            cast(null(), String).label("status"),
+            ActivityLog.details.label("details"),
+        ).where(ActivityLog.asset_id == asset_id, ActivityLog.org_id == org_id)
+        if cutoff:
+            q = q.where(ActivityLog.created_at >= cutoff)
+        branches.append(q)
+    if "assignment" in kinds:
+        q = select(
+            literal("assignment").label("kind"),
+            Assignment.id.label("id"),
+            Assignment.checked_out_at.label("occurred_at"),
+            Assignment.assigned_by.label("actor_id"),
+            literal("checked_out").label("event_type"),
+            Assignment.assigned_to.label("title"),
+            Assignment.status.label("status"),
+            cast(null(), JSON).label("details"),
+        ).where(Assignment.asset_id == asset_id, Assignment.org_id == org_id)
+        if cutoff:
+            q = q.where(Assignment.checked_out_at >= cutoff)
+        branches.append(q)
+    if "incident" in kinds:
+        q = select(
+            literal("incident").label("kind"),
+            Incident.id.label("id"),
+            Incident.created_at.label("occurred_at"),
+            Incident.reported_by.label("actor_id"),
+            literal("incident_reported").label("event_type"),
+            Incident.title.label("title"),
+            Incident.status.label("status"),
+            cast(null(), JSON).label("details"),
+        ).where(Incident.asset_id == asset_id, Incident.org_id == org_id)
+        if cutoff:
+            q = q.where(Incident.created_at >= cutoff)
+        branches.append(q)
+
+    events = union_all(*branches).subquery("events")
+    sort_key = _timeline_sort_key(events.c.occurred_at, db.get_bind().dialect.name)
+    query = select(events, sort_key.label("sort_key"))
+
+    if cursor:
+        after_key, after_kind, after_id = _decode_cursor(cursor)
+        query = query.where(tuple_(sort_key, events.c.kind, events.c.id) < tuple_(after_key, after_kind, after_id))
+
+    rows = db.execute(
+        query.order_by(sort_key.desc(), events.c.kind.desc(), events.c.id.desc()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(last.sort_key, last.kind, last.id)
+
+    return TimelinePage(
+        items=[TimelineEvent(**{k: v for k, v in row._mapping.items() if k != "sort_key"}) for row in rows],
+        next_cursor=next_cursor
+    )
+
+@router.put("/{asset_id}", response_model=AssetResponse, dependencies=[Depends(rate_limit(3))])
 def update_asset(
     asset_id: int,
     asset_update: AssetUpdate,
@@ -150,7 +408,7 @@ def update_asset(
     db.refresh(db_asset)
     return db_asset
 
-@router.delete("/{asset_id}")
+@router.delete("/{asset_id}", dependencies=[Depends(rate_limit(3))])
 def delete_asset(
     asset_id: int,
     db: Session = Depends(get_db),
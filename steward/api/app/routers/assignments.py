@@ -1,26 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timezone
 from fastapi_clerk_auth import HTTPAuthorizationCredentials
 
-from app.core.debs import get_db
+from app.core.debs import get_db, get_read_db
 from app.core.security import clerk_guard
-from app.models.assignment import Assignment
+from app.core.ratelimit import rate_limit
+from app.core.billing import people_cache
+from app.core.tags import normalize_tags
+from app.models.assignment import Assignment, AssignmentTag
 from app.models.asset import Asset
 from app.models.activity import ActivityLog
-from app.schemas.assignment import AssignmentCreate, AssignmentResponse, AssignmentUpdate
+from app.schemas.assignment import AssignmentCreate, AssignmentResponse, AssignmentUpdate, TagCount
 from app.routers.assets import get_org_id, get_user_id, require_admin
 
 router = APIRouter()
 
-@router.post("/checkout", response_model=AssignmentResponse)
-def checkout_asset(
-    assignment: AssignmentCreate,
-    db: Session = Depends(get_db),
-    org_id: str = Depends(get_org_id),
-    admin_id: str = Depends(get_user_id)
-):
+def filter_by_tag(query, org_id: str, tag: Optional[str]):
+    if not tag:
+        return query
+    tagged = select(AssignmentTag.assignment_id).where(
+        AssignmentTag.org_id == org_id,
+        AssignmentTag.tag == tag.strip()
+    )
+    return query.filter(Assignment.id.in_(tagged))
+
+def start_assignment(db: Session, org_id: str, admin_id: str, assignment: AssignmentCreate) -> Assignment:
+    """Checks the asset out in the session without committing; used by checkout and reservation pickup."""
     # 1. Check if asset exists and belongs to org
     asset = db.query(Asset).filter(Asset.id == assignment.asset_id, Asset.org_id == org_id).first()
     if not asset:
@@ -29,10 +37,15 @@ def checkout_asset(
     # 2. Check if asset is available
     if asset.status != "Available":
         raise HTTPException(status_code=400, detail=f"Asset is not available for checkout. Current status: {asset.status}")
+
+    # Enforce people limit from the cached per-org counts (no Clerk call here)
+    people_cache.check_assignee(org_id, assignment.assigned_to)
     
     # 3. Create assignment
+    tags = normalize_tags(assignment.event_tags)
     db_assignment = Assignment(
-        **assignment.model_dump(),
+        **assignment.model_dump(exclude={"event_tags"}),
+        event_tags=tags or None,
         org_id=org_id,
         assigned_by=admin_id,
         checked_out_at=datetime.now(timezone.utc),
@@ -44,6 +57,10 @@ def checkout_asset(
     
     db.add(db_assignment)
     db.flush() # Get IDs
+
+    # Keep the normalized tag index in step with event_tags
+    for tag in tags:
+        db.add(AssignmentTag(org_id=org_id, assignment_id=db_assignment.id, tag=tag))
     
     # 5. Log activity
     log = ActivityLog(
@@ -58,12 +75,22 @@ def checkout_asset(
         }
     )
     db.add(log)
-    
+    return db_assignment
+
+@router.post("/checkout", response_model=AssignmentResponse, dependencies=[Depends(rate_limit(5))])
+def checkout_asset(
+    assignment: AssignmentCreate,
+    db: Session = Depends(get_db),
+    org_id: str = Depends(get_org_id),
+    admin_id: str = Depends(get_user_id)
+):
+    db_assignment = start_assignment(db, org_id, admin_id, assignment)
     db.commit()
+    people_cache.record_assignee(org_id, assignment.assigned_to)
     db.refresh(db_assignment)
     return db_assignment
 
-@router.post("/checkin/{asset_id}", response_model=AssignmentResponse)
+@router.post("/checkin/{asset_id}", response_model=AssignmentResponse, dependencies=[Depends(rate_limit(5))])
 def checkin_asset(
     asset_id: int,
     db: Session = Depends(get_db),
@@ -106,9 +133,10 @@ def checkin_asset(
     db.refresh(assignment)
     return assignment
 
-@router.get("/active", response_model=List[AssignmentResponse])
+@router.get("/active", response_model=List[AssignmentResponse], dependencies=[Depends(rate_limit(2))])
 def get_active_assignments(
-    db: Session = Depends(get_db),
+    tag: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     org_id: str = Depends(get_org_id),
     creds: HTTPAuthorizationCredentials = Depends(clerk_guard)
 ):
@@ -120,12 +148,15 @@ def get_active_assignments(
     
     if role != "org:admin":
         query = query.filter(Assignment.assigned_to == user_id)
+
+    query = filter_by_tag(query, org_id, tag)
         
     return query.all()
 
-@router.get("/history", response_model=List[AssignmentResponse])
+@router.get("/history", response_model=List[AssignmentResponse], dependencies=[Depends(rate_limit(3))])
 def get_all_assignment_history(
-    db: Session = Depends(get_db),
+    tag: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     org_id: str = Depends(get_org_id),
     creds: HTTPAuthorizationCredentials = Depends(clerk_guard)
 ):
@@ -141,16 +172,37 @@ def get_all_assignment_history(
     if role != "org:admin":
         query = query.filter(Assignment.assigned_to == user_id)
 
+    query = filter_by_tag(query, org_id, tag)
+
     return query.order_by(Assignment.actual_return_at.desc()).all()
 
-@router.get("/history/{asset_id}", response_model=List[AssignmentResponse])
+@router.get("/history/{asset_id}", response_model=List[AssignmentResponse], dependencies=[Depends(rate_limit(2))])
 def get_assignment_history(
     asset_id: int,
-    db: Session = Depends(get_db),
+    tag: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     org_id: str = Depends(get_org_id),
     _: bool = Depends(require_admin)
 ):
-    return db.query(Assignment).filter(
+    query = db.query(Assignment).filter(
         Assignment.asset_id == asset_id, 
         Assignment.org_id == org_id
-    ).order_by(Assignment.checked_out_at.desc()).all()
+    )
+    query = filter_by_tag(query, org_id, tag)
+    return query.order_by(Assignment.checked_out_at.desc()).all()
+
+@router.get("/tags", response_model=List[TagCount], dependencies=[Depends(rate_limit(1))])
+def get_tag_counts(
+    db: Session = Depends(get_read_db),
+    org_id: str = Depends(get_org_id),
+    _: bool = Depends(require_admin)
+):
+    """Per-tag usage counts for the org, computed from the assignment_tags index."""
+    count = func.count(AssignmentTag.id)
+    rows = db.execute(
+        select(AssignmentTag.tag, count.label("count"))
+        .where(AssignmentTag.org_id == org_id)
+        .group_by(AssignmentTag.tag)
+        .order_by(count.desc(), AssignmentTag.tag)
+    ).all()
+    return [TagCount(tag=tag, count=n) for tag, n in rows]
@@ -0,0 +1,94 @@
+import json
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from fastapi_clerk_auth import HTTPAuthorizationCredentials
+
+from app.core.security import clerk_guard
+from app.core.billing import plan_memo
+from app.schemas.batch import BatchItem, BatchRequest, BatchItemResult, BatchResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+BATCH_MAX = 20
+# Streams and file downloads don't fit in a batch result; nested batches aren't allowed.
+EXCLUDED_PREFIXES = ("/batch", "/activity/stream", "/export", "/profiles", "/media")
+# Per-request headers that don't apply to the sub-requests.
+DROPPED_HEADERS = {b"content-length", b"content-type", b"idempotency-key", b"x-profile"}
+
+async def _run(request: Request, item: BatchItem) -> BatchItemResult:
+    path, _, query = item.path.partition("?")
+    scope = {
+        **request.scope,
+        "method": "GET",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": [(k, v) for k, v in request.scope["headers"] if k not in DROPPED_HEADERS],
+    }
+    for key in ("endpoint", "route", "path_params"):
+        scope.pop(key, None)
+
+    response = {"status": 500, "headers": [], "chunks": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["chunks"].append(message.get("body", b""))
+
+    try:
+        # The router directly: middleware (auth, admission, idempotency) already ran for the batch.
+        await request.app.router(scope, receive, send)
+    except StarletteHTTPException as e:
+        return BatchItemResult(id=item.id, path=item.path, status=e.status_code, body={"detail": e.detail})
+    except Exception as e:
+        logger.error("Batch sub-request GET %s failed", path, exc_info=e)
+        return BatchItemResult(id=item.id, path=item.path, status=500, body={"detail": "Internal Server Error"})
+
+    body = b"".join(response["chunks"])
+    content_type = next((v for k, v in response["headers"] if k.lower() == b"content-type"), b"")
+    if content_type.startswith(b"application/json") and body:
+        parsed = json.loads(body)
+    else:
+        parsed = body.decode("utf-8", "replace") or None
+    return BatchItemResult(id=item.id, path=item.path, status=response["status"], body=parsed)
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(
+    batch: BatchRequest,
+    request: Request,
+    creds: HTTPAuthorizationCredentials = Depends(clerk_guard)
+):
+    """
+    Runs up to BATCH_MAX read requests in one round trip, in order, and returns
+    each one's status and body. Sub-requests reuse this request's verified token,
+    one database session and one plan lookup; each still counts against its
+    route's rate limit. Only GETs are accepted.
+    """
+    if len(batch.requests) > BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX} requests per batch")
+    for item in batch.requests:
+        if item.method.upper() != "GET":
+            raise HTTPException(status_code=400, detail="Only GET requests can be batched")
+        if not item.path.startswith("/") or item.path.startswith(EXCLUDED_PREFIXES):
+            raise HTTPException(status_code=400, detail=f"{item.path} cannot be batched")
+
+    # Sub-requests share this request's state: clerk_guard picks up the verified
+    # credentials and get_db / get_read_db hand out the batch's sessions.
+    request.state.clerk_credentials = creds
+    request.state.batch_sessions = sessions = {}
+    token = plan_memo.set({})
+    try:
+        results = [await _run(request, item) for item in batch.requests]
+    finally:
+        plan_memo.reset(token)
+        for db in set(sessions.values()):
+            db.close()
+    return BatchResponse(responses=results)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends
 from app.core.security import clerk_guard
 from app.routers.assets import get_org_id
 from app.core.billing import get_org_plan, PlanLimits
+from app.core.ratelimit import rate_limit
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -14,7 +15,7 @@ class PlanResponse(BaseModel):
     has_photos: bool
     has_advanced_reporting: bool
 
-@router.get("/plan", response_model=PlanResponse)
+@router.get("/plan", response_model=PlanResponse, dependencies=[Depends(rate_limit(1))])
 async def get_plan(org_id: str = Depends(get_org_id)):
     plan_type = await get_org_plan(org_id)
     limits = PlanLimits(plan_type)
@@ -0,0 +1,127 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Literal, Optional
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from app.core.shards import session_for_org
+from app.core.billing import get_org_plan, PlanLimits
+from app.core.ratelimit import rate_limit
+from app.models.activity import ActivityLog
+from app.models.assignment import Assignment
+from app.models.incident import Incident
+from app.routers.assets import get_org_id, require_admin
+
+router = APIRouter()
+
+# Rows fetched per round trip; with a server-side cursor this bounds memory.
+EXPORT_BATCH_SIZE = 2000
+
+# dataset -> (model, timestamp column history_days applies to, exported columns)
+EXPORTS = {
+    "activity": (ActivityLog, "created_at", [
+        "id", "asset_id", "asset_name", "actor_id", "event_type", "details", "created_at",
+    ]),
+    "assignments": (Assignment, "checked_out_at", [
+        "id", "asset_id", "assigned_to", "assigned_by", "checked_out_at", "expected_return_at",
+        "actual_return_at", "status", "notes", "event_tags",
+    ]),
+    "incidents": (Incident, "created_at", [
+        "id", "asset_id", "reported_by", "title", "description", "severity", "status",
+        "notes", "is_archived", "created_at", "updated_at",
+    ]),
+}
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+def stream_export(dataset: str, org_id: str, cutoff: Optional[datetime], fmt: str) -> Iterator[bytes]:
+    """
+    Yields the org's rows encoded as CSV or gzip NDJSON, one chunk per batch.
+
+    Runs in Starlette's threadpool with its own session, after the request's
+    dependencies have closed theirs. ``stream_results`` gives a server-side
+    cursor on Postgres, so memory stays flat however many rows are exported.
+    """
+    model, time_column, columns = EXPORTS[dataset]
+    stmt = select(*[getattr(model, c) for c in columns]).where(model.org_id == org_id).order_by(model.id)
+    if cutoff:
+        stmt = stmt.where(getattr(model, time_column) >= cutoff)
+    stmt = stmt.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+
+    db = session_for_org(org_id)
+    try:
+        result = db.execute(stmt)
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for rows in result.partitions():
+                writer.writerows([_csv_value(v) for v in row] for row in rows)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+        else:
+            # wbits=31 writes a gzip header and trailer around the deflate stream.
+            gzip = zlib.compressobj(6, zlib.DEFLATED, 31)
+            for rows in result.partitions():
+                lines = "".join(
+                    json.dumps({c: _json_value(v) for c, v in zip(columns, row)}, default=str) + "\n"
+                    for row in rows
+                )
+                chunk = gzip.compress(lines.encode())
+                if chunk:
+                    yield chunk
+            yield gzip.flush()
+    finally:
+        db.close()
+
+@router.get("/{dataset}", dependencies=[Depends(rate_limit(5))])
+async def export_dataset(
+    dataset: Literal["activity", "assignments", "incidents"],
+    format: Literal["csv", "ndjson"] = "csv",
+    org_id: str = Depends(get_org_id),
+    _: bool = Depends(require_admin)
+):
+    """
+    Streams every row of the dataset within the plan's history window, oldest
+    first. ``csv`` is plain text; ``ndjson`` is gzip-compressed, one JSON object
+    per line. The response is chunked, so the size is not known up front.
+    """
+    plan = await get_org_plan(org_id)
+    limits = PlanLimits(plan)
+    cutoff = None
+    if limits.history_days != float('inf'):
+        cutoff = datetime.now(timezone.utc) - timedelta(days=limits.history_days)
+
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d")
+    if format == "csv":
+        media_type, filename = "text/csv; charset=utf-8", f"{dataset}-{stamp}.csv"
+    else:
+        media_type, filename = "application/gzip", f"{dataset}-{stamp}.ndjson.gz"
+
+    return StreamingResponse(
+        stream_export(dataset, org_id, cutoff, format),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Cache-Control": "no-store",
+            "X-Accel-Buffering": "no",
+        },
+    )
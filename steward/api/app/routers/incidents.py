@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timezone
 
-from app.core.debs import get_db
+from app.core.debs import get_db, get_read_db
 from app.core.security import clerk_guard
+from app.core.ratelimit import rate_limit
 from app.models.incident import Incident
 from app.models.asset import Asset
 from app.models.activity import ActivityLog
@@ -14,7 +16,7 @@ from datetime import timedelta
 
 router = APIRouter()
 
-@router.post("", response_model=IncidentResponse)
+@router.post("", response_model=IncidentResponse, dependencies=[Depends(rate_limit(5))])
 def report_incident(
     incident: IncidentCreate,
     db: Session = Depends(get_db),
@@ -138,7 +140,7 @@ def process_incident_lifecycle(db: Session, org_id: str):
 
 from app.core.billing import get_org_plan, PlanLimits
 
-@router.get("", response_model=List[IncidentResponse])
+@router.get("", response_model=List[IncidentResponse], dependencies=[Depends(rate_limit(3))])
 async def get_incidents(
     db: Session = Depends(get_db),
     org_id: str = Depends(get_org_id),
@@ -147,8 +149,8 @@ async def get_incidents(
     include_archived: bool = False,
     _: bool = Depends(require_admin)
 ):
-    # Run lifecycle processing
-    process_incident_lifecycle(db, org_id)
+    # Run lifecycle processing (it writes, so off the event loop)
+    await run_in_threadpool(process_incident_lifecycle, db, org_id)
     
     query = db.query(Incident).filter(Incident.org_id == org_id)
     
@@ -169,10 +171,10 @@ async def get_incidents(
     
     return query.order_by(Incident.created_at.desc()).all()
 
-@router.get("/{incident_id}", response_model=IncidentResponse)
+@router.get("/{incident_id}", response_model=IncidentResponse, dependencies=[Depends(rate_limit(1))])
 def get_incident(
     incident_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     org_id: str = Depends(get_org_id),
     _: bool = Depends(require_admin)
 ):
@@ -181,7 +183,7 @@ def get_incident(
         raise HTTPException(status_code=404, detail="Incident not found")
     return db_incident
 
-@router.put("/{incident_id}", response_model=IncidentResponse)
+@router.put("/{incident_id}", response_model=IncidentResponse, dependencies=[Depends(rate_limit(3))])
 def update_incident(
     incident_id: int,
     incident_update: IncidentUpdate,
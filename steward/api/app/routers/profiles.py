@@ -0,0 +1,55 @@
+import json
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from app.core.profiling import has_profiling_token, list_profiles, profile_path
+from app.schemas.profile import ProfileSummary, ProfileDetail
+
+router = APIRouter()
+
+# Profiles live on the worker's local disk: these list what this host captured.
+PROFILE_FORMATS = {
+    "speedscope": (".speedscope.json", "application/json"),
+    "collapsed": (".collapsed.txt", "text/plain"),
+}
+
+# Profiles sample every thread in the worker, so they can include other orgs' requests:
+# only operators holding PROFILING_TOKEN may read them, not org admins.
+def require_profiling_token(x_profile: Optional[str] = Header(None)):
+    if not has_profiling_token(x_profile):
+        raise HTTPException(status_code=403, detail="Profiles require the X-Profile operator token")
+    return True
+
+def _find(profile_id: str, suffix: str):
+    path = profile_path(profile_id, suffix)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return path
+
+@router.get("", response_model=List[ProfileSummary])
+async def get_profiles(
+    limit: int = Query(50, ge=1, le=500),
+    org_id: Optional[str] = None,
+    _: bool = Depends(require_profiling_token)
+):
+    """Most recent first; pass org_id to list only that org's requests."""
+    return await run_in_threadpool(list_profiles, org_id, limit)
+
+@router.get("/{profile_id}", response_model=ProfileDetail)
+async def get_profile(
+    profile_id: str,
+    _: bool = Depends(require_profiling_token)
+):
+    path = await run_in_threadpool(_find, profile_id, ".json")
+    return json.loads(path.read_text())
+
+@router.get("/{profile_id}/{fmt}")
+async def download_profile(
+    profile_id: str,
+    fmt: Literal["speedscope", "collapsed"],
+    _: bool = Depends(require_profiling_token)
+):
+    suffix, media_type = PROFILE_FORMATS[fmt]
+    path = await run_in_threadpool(_find, profile_id, suffix)
+    return FileResponse(path, media_type=media_type, filename=f"{profile_id}{suffix}")
@@ -0,0 +1,139 @@
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Literal, Optional
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, extract, cast, Float, or_
+from sqlalchemy.orm import Session
+from app.core.billing import get_org_plan, PlanLimits
+from app.core.cache import LRUCache, MISSING
+from app.core.debs import get_read_db
+from app.core.ratelimit import rate_limit
+from app.core.reporting import utilization
+from app.models.activity import ActivityDailyRollup
+from app.models.asset import Asset
+from app.models.assignment import Assignment
+from app.schemas.report import UtilizationReport, ActivityTrends
+from app.routers.assets import get_org_id, require_admin
+
+router = APIRouter()
+
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "256"))
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL_SECONDS", "300"))
+
+# (org_id, report, window) -> report dict. Reports are aggregates over weeks of
+# data, so a few minutes of staleness is acceptable and spares repeat scans.
+report_cache = LRUCache(maxsize=REPORT_CACHE_SIZE, ttl=REPORT_CACHE_TTL_SECONDS)
+
+async def require_advanced_reporting(org_id: str = Depends(get_org_id)):
+    plan = await get_org_plan(org_id)
+    if not PlanLimits(plan).has_advanced_reporting:
+        raise HTTPException(status_code=403, detail="Advanced reporting requires the Pro plan.")
+    return True
+
+def _epoch(column):
+    # EXTRACT(EPOCH ...) on Postgres, strftime('%s', ...) on SQLite.
+    return cast(extract("epoch", column), Float)
+
+def build_utilization_report(db: Session, org_id: str, days: int) -> dict:
+    window_end = datetime.now(timezone.utc)
+    window_start = window_end - timedelta(days=days)
+
+    assets = db.execute(
+        select(Asset.id, Asset.name, Asset.status).where(Asset.org_id == org_id)
+    ).all()
+    intervals = db.execute(
+        select(
+            Assignment.asset_id,
+            _epoch(Assignment.checked_out_at),
+            _epoch(Assignment.actual_return_at),
+            _epoch(Assignment.expected_return_at),
+        ).where(
+            Assignment.org_id == org_id,
+            Assignment.checked_out_at < window_end,
+            or_(Assignment.actual_return_at.is_(None), Assignment.actual_return_at >= window_start),
+        )
+    ).all()
+
+    # None becomes NaN in a float array, which is how unset timestamps are represented.
+    columns = np.array(intervals, dtype=np.float64).reshape(-1, 4).T
+    names = {asset_id: name for asset_id, name, _ in assets}
+    result = utilization(
+        asset_ids=np.array([a.id for a in assets], dtype=np.float64),
+        asset_statuses=np.array([a.status or "" for a in assets], dtype=object),
+        interval_asset_ids=columns[0],
+        checked_out=columns[1],
+        returned=columns[2],
+        expected=columns[3],
+        window_start=window_start.timestamp(),
+        window_end=window_end.timestamp(),
+    )
+    for row in result["assets"]:
+        row["name"] = names[row["asset_id"]]
+    return {"days": days, "window_start": window_start, "window_end": window_end, **result}
+
+@router.get("/utilization", response_model=UtilizationReport, dependencies=[Depends(rate_limit(5))])
+async def get_utilization(
+    days: int = Query(30, ge=1, le=365),
+    db: Session = Depends(get_read_db),
+    org_id: str = Depends(get_org_id),
+    _: bool = Depends(require_admin),
+    __: bool = Depends(require_advanced_reporting)
+):
+    """
+    Per-asset and per-status utilization (checked-out time as a share of the
+    last ``days`` days), average checkout duration and overdue rate.
+    Cached per org and window for REPORT_CACHE_TTL_SECONDS.
+    """
+    key = (org_id, "utilization", days)
+    report = report_cache.get(key)
+    if report is MISSING:
+        report = await run_in_threadpool(build_utilization_report, db, org_id, days)
+        report_cache.set(key, report)
+    return report
+
+def _bucket_start(day: date, bucket: str) -> date:
+    return day - timedelta(days=day.weekday()) if bucket == "week" else day
+
+@router.get("/activity-trends", response_model=ActivityTrends, dependencies=[Depends(rate_limit(2))])
+async def get_activity_trends(
+    days: int = Query(30, ge=1, le=730),
+    bucket: Literal["day", "week"] = "day",
+    event_type: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    org_id: str = Depends(get_org_id),
+    _: bool = Depends(require_admin),
+    __: bool = Depends(require_advanced_reporting)
+):
+    """
+    Event counts per day (or ISO week, starting Monday) over the last ``days``
+    UTC days, one zero-filled series per event type. Reads only the daily
+    rollups, so the cost is proportional to days x event types.
+    """
+    end = datetime.now(timezone.utc).date()
+    start = end - timedelta(days=days - 1)
+
+    query = db.query(ActivityDailyRollup.day, ActivityDailyRollup.event_type, ActivityDailyRollup.count).filter(
+        ActivityDailyRollup.org_id == org_id,
+        ActivityDailyRollup.day >= start,
+        ActivityDailyRollup.day <= end
+    )
+    if event_type:
+        query = query.filter(ActivityDailyRollup.event_type == event_type)
+
+    counts = defaultdict(lambda: defaultdict(int))
+    for day, kind, count in query:
+        counts[kind][_bucket_start(day, bucket)] += count
+
+    buckets = sorted({_bucket_start(start + timedelta(days=i), bucket) for i in range(days)})
+    series = [
+        {
+            "event_type": kind,
+            "total": sum(by_bucket.values()),
+            "points": [{"day": b, "count": by_bucket.get(b, 0)} for b in buckets],
+        }
+        for kind, by_bucket in sorted(counts.items())
+    ]
+    return {"days": days, "bucket": bucket, "start": start, "end": end, "series": series}
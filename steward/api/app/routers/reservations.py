@@ -0,0 +1,248 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime, timezone
+from fastapi_clerk_auth import HTTPAuthorizationCredentials
+
+from app.core.debs import get_db, get_read_db
+from app.core.security import clerk_guard
+from app.core.ratelimit import rate_limit
+from app.core.billing import people_cache
+from app.core.tags import normalize_tags
+from app.core.reservations import (
+    Span, as_utc, available_asset_ids, checkout_during, is_exclusion_violation,
+    overlapping_reservations, reservation_index, span_of, uses_interval_index,
+)
+from app.models.reservation import Reservation
+from app.models.asset import Asset
+from app.models.activity import ActivityLog
+from app.schemas.assignment import AssignmentCreate, AssignmentResponse
+from app.schemas.reservation import ReservationCreate, ReservationResponse, AvailableAssets
+from app.routers.assets import get_org_id, get_user_id
+from app.routers.assignments import start_assignment
+
+router = APIRouter()
+
+def _conflict(span: Span) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Asset is already reserved from {span.starts_at.isoformat()} to {span.ends_at.isoformat()} "
+               f"(reservation {span.reservation_id})"
+    )
+
+def _check_free(db: Session, org_id: str, version: Optional[int], asset_id: int,
+                start: datetime, end: datetime, exclude_id: Optional[int] = None):
+    """Raises 409 if another live reservation or an active checkout of the asset overlaps [start, end)."""
+    if version is not None:
+        clash = reservation_index.conflicts(db, org_id, version, asset_id, start, end, exclude_id=exclude_id)
+    else:
+        clash = [span_of(r) for r in overlapping_reservations(db, org_id, asset_id, start, end) if r.id != exclude_id]
+    if clash:
+        raise _conflict(clash[0])
+    checkout = checkout_during(db, org_id, asset_id, start, end)
+    if checkout:
+        due = as_utc(checkout.expected_return_at).isoformat() if checkout.expected_return_at else "further notice"
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Asset is checked out until {due} (assignment {checkout.id})"
+        )
+
+def _get_reservation(db: Session, org_id: str, reservation_id: int) -> Reservation:
+    reservation = db.query(Reservation).filter(
+        Reservation.id == reservation_id,
+        Reservation.org_id == org_id
+    ).first()
+    if not reservation:
+        raise HTTPException(status_code=404, detail="Reservation not found")
+    if reservation.status != "Reserved":
+        raise HTTPException(status_code=400, detail=f"Reservation is already {reservation.status.lower()}")
+    return reservation
+
+@router.post("", response_model=ReservationResponse, status_code=201, dependencies=[Depends(rate_limit(5))])
+def create_reservation(
+    reservation: ReservationCreate,
+    db: Session = Depends(get_db),
+    org_id: str = Depends(get_org_id),
+    user_id: str = Depends(get_user_id)
+):
+    starts_at, ends_at = as_utc(reservation.starts_at), as_utc(reservation.ends_at)
+    if ends_at <= starts_at:
+        raise HTTPException(status_code=400, detail="Reservation must end after it starts")
+    if ends_at <= datetime.now(timezone.utc):
+        raise HTTPException(status_code=400, detail="Reservation must end in the future")
+
+    asset = db.query(Asset).filter(Asset.id == reservation.asset_id, Asset.org_id == org_id).first()
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    if asset.status == "Retired":
+        raise HTTPException(status_code=400, detail="Retired assets cannot be reserved")
+
+    reserved_for = reservation.reserved_for or user_id
+    people_cache.check_assignee(org_id, reserved_for)
+
+    # On SQLite this takes the write lock, so the check below can't race another writer.
+    version = reservation_index.bump_version(db, org_id) if uses_interval_index(db) else None
+    _check_free(db, org_id, version, asset.id, starts_at, ends_at)
+
+    db_reservation = Reservation(
+        org_id=org_id,
+        asset_id=asset.id,
+        reserved_for=reserved_for,
+        reserved_by=user_id,
+        starts_at=starts_at,
+        ends_at=ends_at,
+        notes=reservation.notes,
+        event_tags=normalize_tags(reservation.event_tags) or None,
+        status="Reserved"
+    )
+    db.add(db_reservation)
+    try:
+        db.flush()
+    except IntegrityError as e:
+        # Postgres: a concurrent reservation got past the check above.
+        if not is_exclusion_violation(e):
+            raise
+        db.rollback()
+        clash = overlapping_reservations(db, org_id, asset.id, starts_at, ends_at)
+        if clash:
+            raise _conflict(span_of(clash[0]))
+        raise HTTPException(status_code=409, detail="Asset is already reserved for part of that time")
+    span = span_of(db_reservation)
+
+    db.add(ActivityLog(
+        org_id=org_id,
+        asset_id=asset.id,
+        asset_name=asset.name,
+        actor_id=user_id,
+        event_type="reserved",
+        details={
+            "reservation_id": db_reservation.id,
+            "reserved_for": reserved_for,
+            "starts_at": starts_at.isoformat(),
+            "ends_at": ends_at.isoformat()
+        }
+    ))
+
+    db.commit()
+    if version is not None:
+        reservation_index.committed(org_id, version, added=[span])
+    db.refresh(db_reservation)
+    return db_reservation
+
+@router.get("", response_model=List[ReservationResponse], dependencies=[Depends(rate_limit(2))])
+def get_reservations(
+    asset_id: Optional[int] = None,
+    starts_at: Optional[datetime] = None,
+    ends_at: Optional[datetime] = None,
+    status: Optional[str] = "Reserved",
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    org_id: str = Depends(get_org_id),
+    creds: HTTPAuthorizationCredentials = Depends(clerk_guard)
+):
+    """Reservations overlapping [starts_at, ends_at), either bound optional, in start order."""
+    user_id = creds.decoded.get("sub")
+    claims = creds.decoded
+    role = claims.get("org_role") or (claims.get("o") or {}).get("r")
+
+    query = db.query(Reservation).filter(Reservation.org_id == org_id)
+
+    if role != "org:admin":
+        query = query.filter((Reservation.reserved_for == user_id) | (Reservation.reserved_by == user_id))
+    if asset_id is not None:
+        query = query.filter(Reservation.asset_id == asset_id)
+    if starts_at:
+        query = query.filter(Reservation.ends_at > as_utc(starts_at))
+    if ends_at:
+        query = query.filter(Reservation.starts_at < as_utc(ends_at))
+    if status:
+        query = query.filter(Reservation.status == status)
+
+    return query.order_by(Reservation.starts_at, Reservation.id).offset(skip).limit(limit).all()
+
+@router.get("/availability", response_model=AvailableAssets, dependencies=[Depends(rate_limit(2))])
+def get_availability(
+    starts_at: datetime,
+    ends_at: datetime,
+    db: Session = Depends(get_read_db),
+    org_id: str = Depends(get_org_id)
+):
+    """Ids of the org's assets that can be reserved for all of [starts_at, ends_at)."""
+    starts_at, ends_at = as_utc(starts_at), as_utc(ends_at)
+    if ends_at <= starts_at:
+        raise HTTPException(status_code=400, detail="ends_at must be after starts_at")
+    return AvailableAssets(
+        starts_at=starts_at,
+        ends_at=ends_at,
+        asset_ids=available_asset_ids(db, org_id, starts_at, ends_at)
+    )
+
+@router.post("/{reservation_id}/convert", response_model=AssignmentResponse, dependencies=[Depends(rate_limit(5))])
+def convert_reservation(
+    reservation_id: int,
+    db: Session = Depends(get_db),
+    org_id: str = Depends(get_org_id),
+    user_id: str = Depends(get_user_id)
+):
+    """Checks the reserved asset out to the person it was reserved for, due back at the reservation's end."""
+    version = reservation_index.bump_version(db, org_id) if uses_interval_index(db) else None
+    reservation = _get_reservation(db, org_id, reservation_id)
+
+    now = datetime.now(timezone.utc)
+    starts_at, ends_at = as_utc(reservation.starts_at), as_utc(reservation.ends_at)
+    if ends_at <= now:
+        raise HTTPException(status_code=400, detail="Reservation has already ended")
+    # The asset must not be checked out for any of the window, nor (when picked up
+    # early) reserved by anyone else before it starts.
+    _check_free(db, org_id, version, reservation.asset_id, now, ends_at, exclude_id=reservation.id)
+
+    db_assignment = start_assignment(db, org_id, user_id, AssignmentCreate(
+        asset_id=reservation.asset_id,
+        assigned_to=reservation.reserved_for,
+        expected_return_at=ends_at,
+        notes=reservation.notes,
+        event_tags=reservation.event_tags
+    ))
+    reservation.status = "Converted"
+    reservation.assignment_id = db_assignment.id
+
+    db.commit()
+    if version is not None:
+        reservation_index.committed(org_id, version, removed=[reservation_id])
+    people_cache.record_assignee(org_id, db_assignment.assigned_to)
+    db.refresh(db_assignment)
+    return db_assignment
+
+@router.post("/{reservation_id}/cancel", response_model=ReservationResponse, dependencies=[Depends(rate_limit(5))])
+def cancel_reservation(
+    reservation_id: int,
+    db: Session = Depends(get_db),
+    org_id: str = Depends(get_org_id),
+    creds: HTTPAuthorizationCredentials = Depends(clerk_guard)
+):
+    user_id = creds.decoded.get("sub")
+    claims = creds.decoded
+    role = claims.get("org_role") or (claims.get("o") or {}).get("r")
+
+    version = reservation_index.bump_version(db, org_id) if uses_interval_index(db) else None
+    reservation = _get_reservation(db, org_id, reservation_id)
+    if role != "org:admin" and user_id not in (reservation.reserved_for, reservation.reserved_by):
+        raise HTTPException(status_code=403, detail="Only admins can cancel other people's reservations")
+
+    reservation.status = "Cancelled"
+    db.add(ActivityLog(
+        org_id=org_id,
+        asset_id=reservation.asset_id,
+        asset_name=reservation.asset.name if reservation.asset else None,
+        actor_id=user_id,
+        event_type="reservation_cancelled",
+        details={"reservation_id": reservation.id}
+    ))
+
+    db.commit()
+    if version is not None:
+        reservation_index.committed(org_id, version, removed=[reservation_id])
+    db.refresh(reservation)
+    return reservation
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Dict
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from app.core.billing import get_org_plan, PlanLimits
+from app.core.photos import process_photo_async, InvalidPhoto, PHOTO_SIZES
+from app.core.ratelimit import rate_limit
+from app.core.storage import get_object_store
+from app.routers.assets import get_org_id
+
+router = APIRouter()
+
+MAX_PHOTO_BYTES = int(os.getenv("MAX_PHOTO_BYTES", str(20 * 1024 * 1024)))
+PHOTO_CONTENT_TYPES = {"image/jpeg", "image/png", "image/webp"}
+UPLOAD_WRITE_BYTES = 1024 * 1024
+
+class PhotoUploadResponse(BaseModel):
+    sha256: str
+    content_type: str
+    width: int
+    height: int
+    urls: Dict[str, str]  # "original" plus one per generated size
+
+async def require_photos(org_id: str = Depends(get_org_id)):
+    plan = await get_org_plan(org_id)
+    if not PlanLimits(plan).has_photos:
+        raise HTTPException(status_code=403, detail="Photo uploads require the Pro plan.")
+    return True
+
+def _write_chunks(out, digest, chunks):
+    data = b"".join(chunks)
+    digest.update(data)
+    out.write(data)
+
+async def _receive_to_file(request: Request, path: str) -> str:
+    """Streams the request body to disk, enforcing MAX_PHOTO_BYTES; returns its sha256."""
+    digest = hashlib.sha256()
+    size = 0
+    # Hashing and disk writes run in the threadpool, about a megabyte at a time,
+    # so a large upload doesn't hold up the event loop.
+    out = await run_in_threadpool(open, path, "wb")
+    try:
+        pending, buffered = [], 0
+        async for chunk in request.stream():
+            size += len(chunk)
+            if size > MAX_PHOTO_BYTES:
+                raise HTTPException(status_code=413, detail=f"Photo exceeds {MAX_PHOTO_BYTES} bytes")
+            pending.append(chunk)
+            buffered += len(chunk)
+            if buffered >= UPLOAD_WRITE_BYTES:
+                await run_in_threadpool(_write_chunks, out, digest, pending)
+                pending, buffered = [], 0
+        if pending:
+            await run_in_threadpool(_write_chunks, out, digest, pending)
+    finally:
+        await run_in_threadpool(out.close)
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Empty upload")
+    return digest.hexdigest()
+
+def _store_variants(prefix: str, variants) -> Dict[str, str]:
+    store = get_object_store()
+    urls = {}
+    for v in variants:
+        key = f"{prefix}/{v['name']}.{v['ext']}"
+        if not store.exists(key):
+            with open(v["path"], "rb") as f:
+                store.put_file(key, f, v["content_type"])
+        urls[v["name"]] = store.url(key)
+    return urls
+
+@router.post("/photos", response_model=PhotoUploadResponse, status_code=201, dependencies=[Depends(rate_limit(10))])
+async def upload_photo(
+    request: Request,
+    org_id: str = Depends(get_org_id),
+    _: bool = Depends(require_photos)
+):
+    """
+    Send the image as the raw request body (Content-Type image/jpeg, image/png
+    or image/webp), not multipart. The stored original is re-encoded with its EXIF
+    orientation applied and all metadata (GPS, device) removed; smaller sizes
+    are generated alongside it. URLs are derived from the upload's sha256, so
+    re-uploading the same file returns the same URLs. Put them into image_url,
+    condition_photo_url or photo_url.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in PHOTO_CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail=f"Unsupported photo type; send one of {sorted(PHOTO_CONTENT_TYPES)}")
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > MAX_PHOTO_BYTES:
+        raise HTTPException(status_code=413, detail=f"Photo exceeds {MAX_PHOTO_BYTES} bytes")
+
+    workdir = tempfile.mkdtemp(prefix="steward-photo-")
+    try:
+        src = os.path.join(workdir, "upload")
+        digest = await _receive_to_file(request, src)
+        try:
+            variants = await process_photo_async(src, workdir, PHOTO_SIZES)
+        except InvalidPhoto as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        urls = await run_in_threadpool(_store_variants, f"photos/{org_id}/{digest}", variants)
+        original = next(v for v in variants if v["name"] == "original")
+        return PhotoUploadResponse(
+            sha256=digest,
+            content_type=original["content_type"],
+            width=original["width"],
+            height=original["height"],
+            urls=urls,
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
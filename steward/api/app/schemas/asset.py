@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 class AssetBase(BaseModel):
@@ -25,3 +25,28 @@ class AssetResponse(AssetBase):
 
     class Config:
         from_attributes = True
+
+class TimelineEvent(BaseModel):
+    kind: str  # activity, assignment, incident
+    id: int
+    occurred_at: datetime
+    actor_id: Optional[str] = None
+    event_type: str
+    title: Optional[str] = None
+    status: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+
+class TimelinePage(BaseModel):
+    items: List[TimelineEvent]
+    next_cursor: Optional[str] = None
+
+class AssetChanges(BaseModel):
+    mode: str  # snapshot, delta
+    assets: List[AssetResponse]
+    deleted: List[int] = []
+    next_token: str
+    has_more: bool
+
+class QRLookupResult(BaseModel):
+    assets: List[AssetResponse]
+    missing: List[str] = []
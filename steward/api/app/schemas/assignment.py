@@ -32,3 +32,7 @@ class AssignmentResponse(AssignmentBase):
 
     class Config:
         from_attributes = True
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
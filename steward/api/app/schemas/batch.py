@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Optional, List, Any
+
+class BatchItem(BaseModel):
+    path: str  # with any query string, e.g. "/assignments/history/12" or "/incidents?status=Open"
+    method: str = "GET"
+    id: Optional[str] = None  # echoed back, to match results to requests
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem]
+
+class BatchItemResult(BaseModel):
+    id: Optional[str] = None
+    path: str
+    status: int
+    body: Any = None
+
+class BatchResponse(BaseModel):
+    responses: List[BatchItemResult]
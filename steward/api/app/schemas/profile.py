@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+class ProfileSummary(BaseModel):
+    id: str
+    method: str
+    path: str
+    status: Optional[int] = None
+    reason: str  # "header" or "sampled"
+    org_id: Optional[str] = None  # the caller's org, if the request was authenticated
+    request_id: Optional[str] = None
+    started_at: datetime
+    duration_ms: float
+    interval_ms: float
+    samples: int
+    sql_count: int
+    sql_ms: float
+
+class SqlStatement(BaseModel):
+    statement: str
+    ms: float
+    rows: int
+
+class ProfileDetail(ProfileSummary):
+    sql: List[SqlStatement]
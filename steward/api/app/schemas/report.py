@@ -0,0 +1,44 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import date, datetime
+
+class AssetUtilization(BaseModel):
+    asset_id: int
+    name: str
+    status: str
+    utilization: float  # share of the window spent checked out, 0..1
+    checkouts: int
+    avg_checkout_hours: Optional[float] = None
+    overdue_rate: Optional[float] = None
+
+class StatusUtilization(BaseModel):
+    status: str
+    assets: int
+    utilization: float
+
+class UtilizationReport(BaseModel):
+    days: int
+    window_start: datetime
+    window_end: datetime
+    utilization: float
+    checkouts: int
+    avg_checkout_hours: Optional[float] = None
+    overdue_rate: Optional[float] = None
+    by_status: List[StatusUtilization]
+    assets: List[AssetUtilization]
+
+class TrendPoint(BaseModel):
+    day: date  # first day of the bucket
+    count: int
+
+class TrendSeries(BaseModel):
+    event_type: str
+    total: int
+    points: List[TrendPoint]
+
+class ActivityTrends(BaseModel):
+    days: int
+    bucket: str
+    start: date
+    end: date
+    series: List[TrendSeries]
@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+from app.schemas.asset import AssetResponse
+
+class ReservationBase(BaseModel):
+    asset_id: int
+    starts_at: datetime
+    ends_at: datetime
+    notes: Optional[str] = None
+    event_tags: Optional[List[str]] = None
+
+class ReservationCreate(ReservationBase):
+    reserved_for: Optional[str] = None  # defaults to the caller
+
+class ReservationResponse(ReservationBase):
+    id: int
+    org_id: str
+    reserved_for: str
+    reserved_by: str
+    status: str
+    assignment_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    asset: Optional[AssetResponse] = None
+
+    class Config:
+        from_attributes = True
+
+class AvailableAssets(BaseModel):
+    starts_at: datetime
+    ends_at: datetime
+    asset_ids: List[int]
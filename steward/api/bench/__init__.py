@@ -0,0 +1,11 @@
+"""
+Local benchmarks for the Steward API.
+
+Run from steward/api:
+
+    python -m bench                      # every router, p50/p95/p99, rps, SQL per request
+    python -m bench.assignment_tags      # focused micro-benchmarks live in sibling modules
+
+Every benchmark points DATABASE_URL at a throwaway SQLite file unless one is given,
+and talks to a local stand-in for Clerk (see bench/stubs.py).
+"""
@@ -0,0 +1,137 @@
+"""
+Seed a database, drive every router through the ASGI app and report latency.
+
+    python -m bench --orgs 2 --assets 1000 --requests 200 --concurrency 16 --json results.json
+    python -m bench --json after.json --compare before.json
+    python -m bench --database-url postgresql+psycopg://localhost/steward_bench --reset
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+API_DIR = Path(__file__).resolve().parents[1]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    data = parser.add_argument_group("synthetic data (per org)")
+    data.add_argument("--orgs", type=int, default=2)
+    data.add_argument("--assets", type=int, default=1_000)
+    data.add_argument("--assignments", type=int, default=5_000)
+    data.add_argument("--incidents", type=int, default=500)
+    data.add_argument("--activity", type=int, default=20_000)
+    data.add_argument("--users", type=int, default=50)
+    data.add_argument("--seed", type=int, default=42)
+
+    run = parser.add_argument_group("load")
+    run.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    run.add_argument("--concurrency", type=int, default=16)
+    run.add_argument("--warmup", type=int, default=5, help="unmeasured requests per endpoint")
+    run.add_argument("--only", action="append", default=[], help="run endpoints whose name contains this (repeatable)")
+    run.add_argument("--read-only", action="store_true", help="skip endpoints that write")
+    run.add_argument("--plan", choices=["starter", "pro"], default="pro", help="plan returned by the billing stub")
+    run.add_argument("--rate-limit", action="store_true", help="keep the per-org rate limiter on (off by default so it doesn't skew latency)")
+
+    out = parser.add_argument_group("database and output")
+    out.add_argument("--database-url", default=None, help="defaults to a fresh temporary SQLite file")
+    out.add_argument("--reset", action="store_true", help="drop and recreate all tables first (required for a reused database)")
+    out.add_argument("--json", dest="json_path", default=None, help="write results as JSON to this path")
+    out.add_argument("--compare", default=None, help="print deltas against an earlier --json result")
+    return parser.parse_args(argv)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def print_comparison(results, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text())["endpoints"]
+    print(f"\nCompared with {baseline_path} (negative is faster):")
+    for name, stats in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if before[key]:
+                deltas.append(f"{key[:3]} {100 * (stats[key] - before[key]) / before[key]:+6.1f}%")
+        sql_delta = stats["sql_per_request"] - before["sql_per_request"]
+        print(f"  {name:<36} {'  '.join(deltas)}  sql/req {sql_delta:+.2f}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # The app reads DATABASE_URL at import time, so configure it before importing anything from app.
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='steward-bench-')}/bench.db"
+    os.environ.pop("POSTGRES_URL", None)
+    if not args.rate_limit:
+        os.environ["RATE_LIMIT_ENABLED"] = "false"
+    sys.path.insert(0, str(API_DIR))
+
+    from app.core.db import Base, engine
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+
+    import index
+    from app.core.billing import PlanType
+    from app.core.security import clerk_guard
+    from .runner import Context, default_scenarios, run_all
+    from .seed import SeedConfig, seed_database
+    from .stubs import LocalClerk, stub_billing
+
+    clerk = LocalClerk()
+    clerk.install(clerk_guard)
+    stub_billing(PlanType(args.plan))
+
+    config = SeedConfig(
+        orgs=args.orgs, assets=args.assets, assignments=args.assignments, incidents=args.incidents,
+        activity=args.activity, users=args.users, seed=args.seed,
+    )
+    print(f"Seeding {engine.url.render_as_string(hide_password=True)} ...")
+    started = time.perf_counter()
+    orgs = seed_database(engine, config)
+    print(f"  done in {time.perf_counter() - started:.1f}s")
+
+    scenarios = default_scenarios()
+    if args.only:
+        scenarios = [s for s in scenarios if any(term in s.name for term in args.only)]
+    if args.read_only:
+        scenarios = [s for s in scenarios if not s.writes]
+
+    print(f"Running {len(scenarios)} endpoints x {args.requests} requests at concurrency {args.concurrency}")
+    ctx = Context(orgs, clerk, args.seed)
+    results = asyncio.run(run_all(index.app, ctx, scenarios, args.requests, args.concurrency, args.warmup))
+
+    if args.json_path:
+        report = {
+            "meta": {
+                "revision": git_revision(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "dialect": engine.dialect.name,
+                "config": {k: v for k, v in vars(args).items() if k not in ("json_path", "compare", "database_url")},
+            },
+            "endpoints": results,
+        }
+        Path(args.json_path).write_text(json.dumps(report, indent=2))
+        print(f"\nWrote {args.json_path}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Per-request overhead of the in-memory rate limiter.
+
+    python -m bench.ratelimit --keys 10000 --iterations 1000000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=10_000, help="distinct orgs (users = 10x)")
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.core.ratelimit import InMemoryBackend, RateLimiter
+
+    rng = random.Random(0)
+    calls = [(f"org_{rng.randrange(args.keys)}", f"user_{rng.randrange(args.keys * 10)}") for _ in range(10_000)]
+
+    backend = InMemoryBackend()
+    start = time.perf_counter()
+    for i in range(args.iterations):
+        org_id, user_id = calls[i % len(calls)]
+        backend.acquire_now((("org:" + org_id, 1e9, 1e9), ("user:" + user_id, 1e9, 1e9)), 1, time.monotonic())
+    direct = (time.perf_counter() - start) / args.iterations * 1e6
+
+    limiter = RateLimiter(InMemoryBackend())
+
+    async def via_limiter():
+        started = time.perf_counter()
+        for i in range(args.iterations):
+            org_id, user_id = calls[i % len(calls)]
+            await limiter.check(org_id, user_id, 1)
+        return (time.perf_counter() - started) / args.iterations * 1e6
+
+    full = asyncio.run(via_limiter())
+    print(f"InMemoryBackend.acquire_now   {direct:6.2f} us/request")
+    print(f"RateLimiter.check (awaited)   {full:6.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
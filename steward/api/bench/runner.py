@@ -0,0 +1,215 @@
+"""
+Drives the ASGI app in-process and collects per-endpoint statistics.
+
+Each scenario runs as its own phase: ``requests`` calls issued by
+``concurrency`` workers through httpx's ASGI transport. SQL statements are
+attributed to the request that issued them through a context variable, which
+follows the request into the threadpool that runs sync endpoints.
+"""
+import asyncio
+import contextvars
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .seed import OrgData, SEVERITIES, TAGS
+
+_statement_counter: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("bench_statements", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _statement_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+@dataclass
+class Call:
+    method: str
+    url: str
+    headers: dict
+    json: Optional[dict] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    build: Callable[["Context"], Call]
+    writes: bool = False
+
+
+class Context:
+    """Per-run state the scenario builders draw from."""
+
+    def __init__(self, orgs: List[OrgData], clerk, seed: int):
+        self.orgs = orgs
+        self.clerk = clerk
+        self.rng = random.Random(seed)
+        self._headers = {}
+
+    def org(self) -> OrgData:
+        return self.rng.choice(self.orgs)
+
+    def admin(self, org: OrgData) -> dict:
+        key = (org.org_id, org.admin_id)
+        if key not in self._headers:
+            self._headers[key] = self.clerk.headers(org.org_id, org.admin_id, "org:admin")
+        return self._headers[key]
+
+    def member(self, org: OrgData) -> tuple:
+        user_id = self.rng.choice(org.member_ids or [org.admin_id])
+        key = (org.org_id, user_id)
+        if key not in self._headers:
+            self._headers[key] = self.clerk.headers(org.org_id, user_id, "org:member")
+        return user_id, self._headers[key]
+
+
+def _checkout(ctx: Context) -> Call:
+    org = ctx.org()
+    asset_id = org.available_asset_ids.pop() if org.available_asset_ids else ctx.rng.choice(org.asset_ids)
+    org.checked_out_asset_ids.append(asset_id)
+    user_id, _ = ctx.member(org)
+    return Call("POST", "/assignments/checkout", ctx.admin(org), {
+        "asset_id": asset_id,
+        "assigned_to": user_id,
+        "event_tags": ctx.rng.sample(TAGS, 2),
+    })
+
+
+def _checkin(ctx: Context) -> Call:
+    org = ctx.org()
+    asset_id = org.checked_out_asset_ids.pop(0) if org.checked_out_asset_ids else ctx.rng.choice(org.asset_ids)
+    org.available_asset_ids.insert(0, asset_id)
+    return Call("POST", f"/assignments/checkin/{asset_id}", ctx.admin(org))
+
+
+def _report_incident(ctx: Context) -> Call:
+    org = ctx.org()
+    return Call("POST", "/incidents", ctx.admin(org), {
+        "asset_id": ctx.rng.choice(org.available_asset_ids or org.asset_ids),
+        "title": "Bench incident",
+        "description": "Reported by the benchmark",
+        "severity": ctx.rng.choice(SEVERITIES[:2]),
+    })
+
+
+def _member_active(ctx: Context) -> Call:
+    org = ctx.org()
+    _, headers = ctx.member(org)
+    return Call("GET", "/assignments/active", headers)
+
+
+def _admin(name: str, method: str, path, body=None, writes: bool = False) -> Scenario:
+    def build(ctx: Context) -> Call:
+        org = ctx.org()
+        return Call(method, path(ctx, org), ctx.admin(org), body(ctx, org) if body else None)
+    return Scenario(name, build, writes)
+
+
+def default_scenarios() -> List[Scenario]:
+    any_asset = lambda ctx, org: ctx.rng.choice(org.asset_ids)
+    any_incident = lambda ctx, org: ctx.rng.choice(org.incident_ids)
+
+    return [
+        _admin("GET /health", "GET", lambda ctx, org: "/health"),
+        _admin("GET /billing/plan", "GET", lambda ctx, org: "/billing/plan"),
+        _admin("GET /assets", "GET", lambda ctx, org: "/assets"),
+        _admin("GET /assets?search", "GET", lambda ctx, org: "/assets?search=Asset%201"),
+        _admin("GET /assets/{id}", "GET", lambda ctx, org: f"/assets/{any_asset(ctx, org)}"),
+        _admin("GET /assets/changes", "GET", lambda ctx, org: "/assets/changes?limit=100"),
+        _admin("GET /assets/by-qr/{code}", "GET", lambda ctx, org: f"/assets/by-qr/{ctx.rng.choice(org.qr_codes[:50])}"),
+        _admin("GET /assets/by-qr?codes (x10)", "GET",
+               lambda ctx, org: "/assets/by-qr?" + "&".join(f"codes={c}" for c in ctx.rng.sample(org.qr_codes, 10))),
+        _admin("GET /assets/{id}/timeline", "GET", lambda ctx, org: f"/assets/{any_asset(ctx, org)}/timeline"),
+        _admin("POST /assets", "POST", lambda ctx, org: "/assets",
+               lambda ctx, org: {"name": f"Bench asset {ctx.rng.randrange(10**9)}"}, writes=True),
+        _admin("PUT /assets/{id}", "PUT", lambda ctx, org: f"/assets/{any_asset(ctx, org)}",
+               lambda ctx, org: {"description": f"Updated {ctx.rng.randrange(10**9)}"}, writes=True),
+        _admin("GET /assignments/active (admin)", "GET", lambda ctx, org: "/assignments/active"),
+        Scenario("GET /assignments/active (member)", _member_active),
+        _admin("GET /assignments/history", "GET", lambda ctx, org: "/assignments/history"),
+        _admin("GET /assignments/history?tag", "GET", lambda ctx, org: f"/assignments/history?tag={ctx.rng.choice(TAGS)}"),
+        _admin("GET /assignments/history/{id}", "GET", lambda ctx, org: f"/assignments/history/{any_asset(ctx, org)}"),
+        _admin("GET /assignments/tags", "GET", lambda ctx, org: "/assignments/tags"),
+        Scenario("POST /assignments/checkout", _checkout, writes=True),
+        Scenario("POST /assignments/checkin/{id}", _checkin, writes=True),
+        _admin("GET /activity", "GET", lambda ctx, org: "/activity"),
+        _admin("GET /activity?asset_id", "GET", lambda ctx, org: f"/activity?asset_id={any_asset(ctx, org)}"),
+        _admin("GET /reports/utilization", "GET", lambda ctx, org: "/reports/utilization"),
+        _admin("GET /reports/activity-trends", "GET", lambda ctx, org: "/reports/activity-trends?days=90"),
+        _admin("GET /incidents", "GET", lambda ctx, org: "/incidents"),
+        _admin("GET /incidents/{id}", "GET", lambda ctx, org: f"/incidents/{any_incident(ctx, org)}"),
+        Scenario("POST /incidents", _report_incident, writes=True),
+        _admin("PUT /incidents/{id}", "PUT", lambda ctx, org: f"/incidents/{any_incident(ctx, org)}",
+               lambda ctx, org: {"notes": [{"text": "bench note"}]}, writes=True),
+    ]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def run_scenario(client: httpx.AsyncClient, ctx: Context, scenario: Scenario, requests: int, concurrency: int) -> Dict:
+    latencies, statements, statuses = [], [], {}
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            call = scenario.build(ctx)
+            counter = [0]
+            token = _statement_counter.set(counter)
+            start = time.perf_counter()
+            try:
+                response = await client.request(call.method, call.url, headers=call.headers, json=call.json)
+                status = response.status_code
+            except Exception as exc:
+                status = type(exc).__name__
+            finally:
+                latencies.append(time.perf_counter() - start)
+                _statement_counter.reset(token)
+            statements.append(counter[0])
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    errors = sum(n for status, n in statuses.items() if not (isinstance(status, int) and status < 400))
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(k): v for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))},
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / wall, 1) if wall else 0.0,
+        "sql_per_request": round(sum(statements) / len(statements), 2) if statements else 0.0,
+    }
+
+
+async def run_all(app, ctx: Context, scenarios: List[Scenario], requests: int, concurrency: int, warmup: int = 5) -> Dict[str, Dict]:
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for scenario in scenarios:
+            if warmup:
+                await run_scenario(client, ctx, scenario, warmup, 1)
+            results[scenario.name] = await run_scenario(client, ctx, scenario, requests, concurrency)
+            stats = results[scenario.name]
+            print(f"  {scenario.name:<36} p50 {stats['p50_ms']:8.2f}  p95 {stats['p95_ms']:8.2f}  "
+                  f"p99 {stats['p99_ms']:8.2f} ms  {stats['throughput_rps']:8.1f} rps  "
+                  f"{stats['sql_per_request']:6.2f} sql/req  errors {stats['errors']}")
+    return results
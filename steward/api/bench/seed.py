@@ -0,0 +1,183 @@
+"""
+Synthetic data generator for benchmarks.
+
+Rows are written with Core bulk inserts and explicit ids so millions of rows
+seed in seconds; on Postgres the id sequences are moved past the seeded ids
+afterwards so the API can keep inserting.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import insert, select, func, text
+
+from app.models.activity import ActivityLog
+from app.models.asset import Asset
+from app.models.assignment import Assignment, AssignmentTag
+from app.models.incident import Incident
+from app.core.rollups import rebuild_rollups
+
+CHUNK = 20_000
+
+TAGS = ["Wedding", "Concert", "Conference", "Festival", "Corporate", "Theatre", "Sports", "Gala"]
+SEVERITIES = ["Low", "Medium", "High", "Critical"]
+INCIDENT_STATUSES = ["Open", "In Progress", "Resolved", "Closed"]
+EVENT_TYPES = ["created", "updated", "checked_out", "checked_in", "incident_reported", "incident_updated"]
+
+
+@dataclass
+class SeedConfig:
+    orgs: int = 2
+    assets: int = 1_000          # per org
+    assignments: int = 5_000     # per org
+    incidents: int = 500         # per org
+    activity: int = 20_000       # per org
+    users: int = 50              # per org, excluding the admin
+    active_ratio: float = 0.1    # share of assets left checked out
+    seed: int = 42
+
+
+@dataclass
+class OrgData:
+    org_id: str
+    admin_id: str
+    member_ids: List[str]
+    asset_ids: List[int] = field(default_factory=list)
+    qr_codes: List[str] = field(default_factory=list)
+    available_asset_ids: List[int] = field(default_factory=list)
+    checked_out_asset_ids: List[int] = field(default_factory=list)
+    incident_ids: List[int] = field(default_factory=list)
+
+
+def _next_id(conn, model) -> int:
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _insert_chunked(engine, model, rows):
+    for start in range(0, len(rows), CHUNK):
+        with engine.begin() as conn:
+            conn.execute(insert(model), rows[start:start + CHUNK])
+
+
+def _bump_sequences(engine, models):
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for model in models:
+            table = model.__tablename__
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 1) FROM {table}))"
+            ))
+
+
+def seed_database(engine, config: SeedConfig) -> List[OrgData]:
+    rng = random.Random(config.seed)
+    now = datetime.now(timezone.utc)
+    orgs = []
+
+    with engine.connect() as conn:
+        ids = {model: _next_id(conn, model) for model in (Asset, Assignment, AssignmentTag, Incident, ActivityLog)}
+
+    for o in range(config.orgs):
+        org = OrgData(
+            org_id=f"org_bench_{o}",
+            admin_id=f"user_bench_{o}_admin",
+            member_ids=[f"user_bench_{o}_{u}" for u in range(config.users)],
+        )
+        people = org.member_ids or [org.admin_id]
+
+        # Assets; the first active_ratio of them stay checked out
+        n_active = int(config.assets * config.active_ratio)
+        assets = []
+        for i in range(config.assets):
+            asset_id = ids[Asset] + i
+            checked_out = i < n_active
+            assets.append({
+                "id": asset_id,
+                "org_id": org.org_id,
+                "name": f"Asset {o}-{i}",
+                "description": "Synthetic benchmark asset",
+                "status": "Checked Out" if checked_out else "Available",
+                "qr_code": f"QR-{o}-{i}",
+                "created_by": org.admin_id,
+                "created_at": now - timedelta(days=rng.randint(30, 365)),
+            })
+            org.asset_ids.append(asset_id)
+            org.qr_codes.append(f"QR-{o}-{i}")
+            (org.checked_out_asset_ids if checked_out else org.available_asset_ids).append(asset_id)
+        ids[Asset] += config.assets
+        _insert_chunked(engine, Asset, assets)
+
+        # Assignments: one Active per checked-out asset, the rest Returned
+        assignments, tags = [], []
+        for i in range(config.assignments if org.asset_ids else 0):
+            assignment_id = ids[Assignment] + i
+            active = i < n_active
+            asset_id = org.checked_out_asset_ids[i] if active else rng.choice(org.asset_ids)
+            checked_out_at = now - timedelta(minutes=rng.randint(60, 90 * 24 * 60))
+            event_tags = rng.sample(TAGS, rng.randint(0, 3))
+            assignments.append({
+                "id": assignment_id,
+                "org_id": org.org_id,
+                "asset_id": asset_id,
+                "assigned_to": rng.choice(people),
+                "assigned_by": org.admin_id,
+                "checked_out_at": checked_out_at,
+                "expected_return_at": checked_out_at + timedelta(days=rng.randint(1, 7)),
+                "actual_return_at": None if active else checked_out_at + timedelta(hours=rng.randint(1, 240)),
+                "status": "Active" if active else "Returned",
+                "event_tags": event_tags,
+            })
+            for tag in event_tags:
+                tags.append({"id": ids[AssignmentTag], "org_id": org.org_id, "assignment_id": assignment_id, "tag": tag})
+                ids[AssignmentTag] += 1
+        ids[Assignment] += len(assignments)
+        _insert_chunked(engine, Assignment, assignments)
+        _insert_chunked(engine, AssignmentTag, tags)
+
+        incidents = []
+        for i in range(config.incidents if org.asset_ids else 0):
+            incident_id = ids[Incident] + i
+            created_at = now - timedelta(minutes=rng.randint(1, 60 * 24 * 60))
+            incidents.append({
+                "id": incident_id,
+                "org_id": org.org_id,
+                "asset_id": rng.choice(org.asset_ids),
+                "reported_by": rng.choice(people),
+                "title": f"Incident {i}",
+                "description": "Synthetic benchmark incident",
+                "severity": rng.choice(SEVERITIES),
+                "status": rng.choice(INCIDENT_STATUSES),
+                "notes": [],
+                "is_archived": False,
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+            org.incident_ids.append(incident_id)
+        ids[Incident] += len(incidents)
+        _insert_chunked(engine, Incident, incidents)
+
+        activity = []
+        for i in range(config.activity if org.asset_ids else 0):
+            asset_id = rng.choice(org.asset_ids)
+            activity.append({
+                "id": ids[ActivityLog] + i,
+                "org_id": org.org_id,
+                "asset_id": asset_id,
+                "asset_name": f"Asset {o}-{asset_id - org.asset_ids[0]}",
+                "actor_id": rng.choice(people),
+                "event_type": rng.choice(EVENT_TYPES),
+                "details": {"source": "bench"},
+                "created_at": now - timedelta(seconds=rng.randint(1, 90 * 24 * 3600)),
+            })
+        ids[ActivityLog] += len(activity)
+        _insert_chunked(engine, ActivityLog, activity)
+        # Bulk inserts bypass the ORM flush listener that maintains rollups.
+        with engine.begin() as conn:
+            rebuild_rollups(conn, org.org_id)
+
+        orgs.append(org)
+
+    _bump_sequences(engine, (Asset, Assignment, AssignmentTag, Incident, ActivityLog))
+    return orgs
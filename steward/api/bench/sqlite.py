@@ -0,0 +1,109 @@
+"""
+SQLite under concurrent reads and writes: the tuned mode (WAL, pragmas, pooled
+connections, writer lock) vs. the previous setup (NullPool, default journal).
+
+    python -m bench.sqlite --threads 16 --seconds 10 --write-ratio 0.2
+
+Each thread loops for --seconds: reads list an org's assets, writes read an
+asset and then update it and log activity in one transaction, like a checkout.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--assets", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(label, engine, org_id, asset_ids, args):
+    from sqlalchemy.orm import sessionmaker
+    from app.models.activity import ActivityLog
+    from app.models.asset import Asset
+
+    Session = sessionmaker(bind=engine, autoflush=False)
+    latencies = {"read": [], "write": []}
+    errors = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def worker(seed):
+        rng = random.Random(seed)
+        local = {"read": [], "write": []}
+        while time.perf_counter() < deadline:
+            kind = "write" if rng.random() < args.write_ratio else "read"
+            started = time.perf_counter()
+            db = Session()
+            try:
+                if kind == "read":
+                    db.query(Asset).filter(Asset.org_id == org_id).order_by(Asset.id).limit(50).all()
+                else:
+                    asset = db.get(Asset, rng.choice(asset_ids))
+                    asset.status = "checked_out" if asset.status != "checked_out" else "available"
+                    db.add(ActivityLog(org_id=org_id, asset_id=asset.id, asset_name=asset.name,
+                                       actor_id="bench", event_type="updated", details={"status": asset.status}))
+                    db.commit()
+                local[kind].append((time.perf_counter() - started) * 1000)
+            except Exception as e:
+                db.rollback()
+                with lock:
+                    key = f"{kind}: {str(e).splitlines()[0][:60]}"
+                    errors[key] = errors.get(key, 0) + 1
+            finally:
+                db.close()
+        with lock:
+            for kind in local:
+                latencies[kind].extend(local[kind])
+
+    threads = [threading.Thread(target=worker, args=(args.seed + i,)) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    print(f"{label}")
+    for kind, values in latencies.items():
+        print(f"  {kind:<6} {len(values) / args.seconds:9.1f} ops/s   p50 {percentile(values, 50):8.2f}  "
+              f"p95 {percentile(values, 95):8.2f}  p99 {percentile(values, 99):8.2f} ms")
+    print(f"  errors {sum(errors.values())}" + "".join(f"\n    {n:6d} x {msg}" for msg, n in errors.items()))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix="steward-sqlite-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/app.db"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from app.core.db import Base, make_engine
+    from app.models import activity, asset, assignment, incident  # noqa: F401
+    from .seed import SeedConfig, seed_database
+
+    print(f"{args.threads} threads, {args.seconds:.0f}s each, {args.write_ratio:.0%} writes")
+    for label, tuned in (("previous (NullPool, rollback journal)", False), ("tuned (WAL, pooled, writer lock)", True)):
+        engine = make_engine(f"sqlite:///{workdir}/{'tuned' if tuned else 'previous'}.db", sqlite_tuned=tuned)
+        Base.metadata.create_all(bind=engine)
+        config = SeedConfig(orgs=1, assets=args.assets, assignments=0, incidents=0, activity=0, seed=args.seed)
+        org = seed_database(engine, config)[0]
+        run(label, engine, org.org_id, org.asset_ids, args)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
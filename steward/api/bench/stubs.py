@@ -0,0 +1,59 @@
+"""
+Local stand-ins for Clerk.
+
+Auth is not mocked out: a throwaway RSA key is generated, its public half is
+installed as the guard's JWKS, and requests carry real RS256 tokens, so the
+benchmark pays the same verification cost as production. Only the outbound
+Clerk Backend API calls (plan and member count lookups) are replaced.
+"""
+import json
+import sys
+import time
+import uuid
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from app.core import billing
+from app.core.billing import PlanType
+
+
+class LocalClerk:
+    def __init__(self):
+        self.kid = f"bench-{uuid.uuid4().hex[:8]}"
+        self._private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = json.loads(RSAAlgorithm.to_jwk(self._private_key.public_key()))
+        jwk.update({"kid": self.kid, "alg": "RS256", "use": "sig"})
+        self.jwks = {"keys": [jwk]}
+
+    def install(self, guard):
+        guard.jwks_keys = self.jwks
+        # Never reach out to the real JWKS endpoint while benchmarking
+        guard.refresh_keys = lambda: None
+
+    def token(self, org_id: str, user_id: str, role: str = "org:admin", ttl: int = 3600) -> str:
+        now = int(time.time())
+        claims = {"sub": user_id, "org_id": org_id, "org_role": role, "iat": now, "nbf": now, "exp": now + ttl}
+        return jwt.encode(claims, self._private_key, algorithm="RS256", headers={"kid": self.kid})
+
+    def headers(self, org_id: str, user_id: str, role: str = "org:admin") -> dict:
+        return {"Authorization": f"Bearer {self.token(org_id, user_id, role)}"}
+
+
+def _patch_everywhere(name: str, original, replacement):
+    # Routers import these helpers by name, so patch every module that holds a reference.
+    for module_name, module in list(sys.modules.items()):
+        if module_name.startswith("app.") and getattr(module, name, None) is original:
+            setattr(module, name, replacement)
+
+
+def stub_billing(plan: PlanType = PlanType.PRO, member_count: int = 0):
+    async def get_org_plan(org_id: str) -> PlanType:
+        return plan
+
+    async def get_org_member_count(org_id: str) -> int:
+        return member_count
+
+    _patch_everywhere("get_org_plan", billing.get_org_plan, get_org_plan)
+    _patch_everywhere("get_org_member_count", billing.get_org_member_count, get_org_member_count)
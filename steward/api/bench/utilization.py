@@ -0,0 +1,81 @@
+"""
+GET /reports/utilization at scale: the columnar query + NumPy report vs. the
+same numbers computed with a per-row Python loop over ORM objects.
+
+    python -m bench.utilization --assignments 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assignments", type=int, default=1_000_000)
+    parser.add_argument("--assets", type=int, default=5_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--skip-loop", action="store_true", help="don't run the per-row Python baseline")
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def timed(label, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"  {label:<44} {elapsed:10.1f} ms")
+    return result
+
+
+def loop_report(db, org_id, days):
+    """Busy time and checkout counts per asset, row by row."""
+    from datetime import datetime, timedelta, timezone
+    from app.models.assignment import Assignment
+
+    window_end = datetime.now(timezone.utc)
+    window_start = window_end - timedelta(days=days)
+    busy, checkouts = defaultdict(float), defaultdict(int)
+    for a in db.query(Assignment).filter(Assignment.org_id == org_id).yield_per(10_000):
+        start = a.checked_out_at.replace(tzinfo=timezone.utc)
+        end = a.actual_return_at.replace(tzinfo=timezone.utc) if a.actual_return_at else window_end
+        overlap = (min(end, window_end) - max(start, window_start)).total_seconds()
+        if overlap > 0:
+            busy[a.asset_id] += overlap
+        if window_start <= start < window_end:
+            checkouts[a.asset_id] += 1
+    return busy, checkouts
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from app.core.db import Base, engine, SessionLocal
+    from app.routers.reports import build_utilization_report
+    from .seed import SeedConfig, seed_database
+
+    Base.metadata.create_all(bind=engine)
+    config = SeedConfig(orgs=1, assets=args.assets, assignments=args.assignments, incidents=0, activity=0, seed=args.seed)
+    print(f"Seeding {args.assignments:,} assignments into {engine.url} ...")
+    org_id = timed("seed", lambda: seed_database(engine, config))[0].org_id
+
+    db = SessionLocal()
+    try:
+        print(f"Utilization over {args.days} days")
+        report = timed("columnar query + numpy", lambda: build_utilization_report(db, org_id, args.days))
+        if not args.skip_loop:
+            busy, checkouts = timed("ORM rows + python loop", lambda: loop_report(db, org_id, args.days))
+            assert sum(checkouts.values()) == report["checkouts"], "loop and numpy disagree on checkouts"
+        print(f"  org utilization {report['utilization']:.1%}, {report['checkouts']:,} checkouts, "
+              f"overdue rate {report['overdue_rate'] or 0:.1%}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import os
+import logging
 from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
 from fastapi_clerk_auth import HTTPAuthorizationCredentials
 
 # Ensure app directory is discoverable
@@ -9,32 +11,78 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 
+# Before the other app imports, some of which log while loading.
+from app.core.logs import configure_logging, logging_stats, RequestIdMiddleware, request_id_var
+configure_logging()
+
 from app.core.security import clerk_guard
 from app.core.config import get_database_url
-from app.core.db import Base, engine
-from app.routers import assets, assignments, activity, incidents, billing
+from app.core.shards import create_tables
+from app.core.events import broker
+from app.core import rollups  # registers the activity rollup flush listener
+from app.core.billing import people_cache
+from app.core.reservations import reservation_index
+from app.core.lifecycle import lifecycle, warm_up
+from app.core.admission import AdmissionMiddleware, admission
+from app.core.coalesce import CoalescingMiddleware, response_cache
+from app.core.idempotency import IdempotencyMiddleware, idempotency_sweeper
+from app.core.profiling import PROFILING_ENABLED, ProfilingMiddleware
+from app.core.photos import shutdown_pool
+from app.core.storage import OBJECT_STORE_BACKEND, MEDIA_BASE_URL, get_object_store
+from app.routers import assets, assignments, activity, incidents, billing, export, reports, uploads, profiles, reservations, batch
 from app.models.assignment import Assignment 
 from app.models.activity import ActivityLog 
 from app.models.incident import Incident 
+from app.models.shard import OrgShard
+from app.models.reservation import Reservation
+
+logger = logging.getLogger("steward")
 
-# Initialize Database
-Base.metadata.create_all(bind=engine)
+# Initialize Database (every shard)
+create_tables()
 
 app = FastAPI(title="Steward API")
 
+# Innermost: coalesced followers and idempotent replays never take a slot.
+app.add_middleware(AdmissionMiddleware)
+# Added before CORS so CORS stays outermost and shared or replayed responses get per-request CORS headers.
+app.add_middleware(CoalescingMiddleware)
+app.add_middleware(IdempotencyMiddleware)
+if PROFILING_ENABLED:
+    # Not installed at all otherwise, so profiling costs nothing while off.
+    app.add_middleware(ProfilingMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "X-Profile-Id"],
 )
 
+@app.on_event("startup")
+async def start_background_tasks():
+    await broker.start()
+    await people_cache.start()
+    await idempotency_sweeper.start()
+    await warm_up()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    lifecycle.ready = False
+    await broker.stop()
+    await people_cache.stop()
+    await idempotency_sweeper.stop()
+    shutdown_pool()
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
+    logger.error("Unhandled exception on %s %s", request.method, request.url.path, exc_info=exc)
     return JSONResponse(
         status_code=500,
-        content={"detail": f"Internal Server Error: {str(exc)}", "type": str(type(exc))},
+        content={"detail": f"Internal Server Error: {str(exc)}", "type": str(type(exc)), "request_id": request_id_var.get()},
     )
 
 # Register routers
@@ -43,11 +91,32 @@ app.include_router(assignments.router, prefix="/assignments", tags=["Assignments
 app.include_router(activity.router, prefix="/activity", tags=["Activity"])
 app.include_router(incidents.router, prefix="/incidents", tags=["Incidents"])
 app.include_router(billing.router, prefix="/billing", tags=["Billing"])
+app.include_router(export.router, prefix="/export", tags=["Export"])
+app.include_router(reports.router, prefix="/reports", tags=["Reports"])
+app.include_router(uploads.router, prefix="/uploads", tags=["Uploads"])
+app.include_router(profiles.router, prefix="/profiles", tags=["Profiles"])
+app.include_router(reservations.router, prefix="/reservations", tags=["Reservations"])
+app.include_router(batch.router, prefix="/batch", tags=["Batch"])
+
+if OBJECT_STORE_BACKEND == "local":
+    app.mount(MEDIA_BASE_URL, StaticFiles(directory=get_object_store().root), name="media")
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/metrics")
+def metrics():
+    # Per-worker counters
+    return {"response_cache": response_cache.stats(), "reservation_index": reservation_index.stats(),
+            "admission": admission.stats(), "logging": logging_stats()}
+
+@app.get("/ready")
+def ready():
+    # Unlike /health, fails while warming up or draining so load balancers route around this worker.
+    status = lifecycle.status()
+    return JSONResponse(status_code=200 if status == "ready" else 503, content={"status": status})
+
 @app.get("/me")
 def me(creds: HTTPAuthorizationCredentials = Depends(clerk_guard)):
     claims = creds.decoded
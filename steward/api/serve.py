@@ -0,0 +1,161 @@
+"""
+Production entry point: pre-forks N uvicorn workers sharing one listening socket.
+
+    python serve.py --workers 4 --port 8000
+
+The app is imported once in this (parent) process, so imports, table creation
+and route setup happen before forking and workers start from a warm copy.
+Each worker then runs the app's startup (background tasks and warm_up) before
+it accepts connections. Workers that die are replaced.
+
+On SIGTERM the parent marks every worker as draining (/ready returns 503),
+waits --drain-seconds for load balancers to notice, then asks the workers to
+stop; uvicorn finishes in-flight requests for up to --graceful-timeout seconds.
+SIGINT (Ctrl-C) skips the drain wait.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+
+logger = logging.getLogger("serve")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--drain-seconds", type=float, default=float(os.getenv("DRAIN_SECONDS", "5")))
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", "30")))
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    parser.add_argument("--proxy-headers", action="store_true", help="trust X-Forwarded-* from --forwarded-allow-ips")
+    parser.add_argument("--forwarded-allow-ips", default=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"))
+    return parser.parse_args(argv)
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Long-lived workers keep a small connection pool instead of one connection per session.
+    os.environ.setdefault("DATABASE_POOL_SIZE", "5")
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+    import uvicorn
+    import index
+    from app.core.db import dispose_engines
+    from app.core.logs import configure_logging, flush_logs
+    from app.core.lifecycle import lifecycle
+
+    draining = multiprocessing.Value("b", 0, lock=False)
+    lifecycle.share_draining_flag(draining)
+    sock = bind_socket(args.host, args.port, args.backlog)
+    # Connections opened while importing (e.g. create_all) must not be shared with the children.
+    dispose_engines()
+
+    def run_worker():
+        # Own process group, so a terminal's Ctrl-C reaches only the parent, which coordinates shutdown.
+        os.setpgid(0, 0)
+        # The log writer thread did not survive the fork; start this worker's own.
+        configure_logging(force=True)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        config = uvicorn.Config(
+            index.app,
+            lifespan="on",
+            # Leave uvicorn's loggers unconfigured so they propagate to the JSON handler.
+            log_config=None,
+            log_level=args.log_level,
+            timeout_graceful_shutdown=args.graceful_timeout,
+            proxy_headers=args.proxy_headers,
+            forwarded_allow_ips=args.forwarded_allow_ips,
+        )
+        uvicorn.Server(config).run(sockets=[sock])
+
+    workers = set()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker()
+            except BaseException as e:
+                logger.error("Worker %s crashed: %s", os.getpid(), e)
+                code = 1
+            finally:
+                flush_logs()
+                os._exit(code)
+        workers.add(pid)
+
+    def reap(block: bool = False):
+        while workers:
+            try:
+                pid, status = os.waitpid(-1, 0 if block else os.WNOHANG)
+            except ChildProcessError:
+                workers.clear()
+                return
+            if pid == 0:
+                return
+            workers.discard(pid)
+            yield pid, status
+
+    stop = {"signal": None}
+
+    def on_signal(signum, frame):
+        stop["signal"] = signum
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+
+    logger.info("Starting %s workers on %s:%s (parent pid %s)", args.workers, args.host, args.port, os.getpid())
+    for _ in range(args.workers):
+        spawn()
+
+    while stop["signal"] is None:
+        for pid, status in reap():
+            if stop["signal"] is None:
+                logger.warning("Worker %s exited (%s), starting a replacement", pid, status)
+                time.sleep(1)
+                spawn()
+        time.sleep(0.2)
+
+    lifecycle.start_draining()
+    if stop["signal"] == signal.SIGTERM and args.drain_seconds > 0:
+        logger.info("Draining: /ready returns 503, stopping workers in %.0fs", args.drain_seconds)
+        time.sleep(args.drain_seconds)
+
+    for pid in list(workers):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    deadline = time.monotonic() + args.graceful_timeout + 5
+    while workers and time.monotonic() < deadline:
+        list(reap())
+        time.sleep(0.1)
+    for pid in list(workers):
+        logger.warning("Worker %s did not stop in time, killing it", pid)
+        os.kill(pid, signal.SIGKILL)
+    list(reap(block=True))
+    sock.close()
+    logger.info("Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import pytest
+from fastapi import Request
+from fastapi.testclient import TestClient
+
+from index import app
+from app.core.security import clerk_guard, ClerkCredentials
+
+ADMIN = {"Authorization": "Bearer org_res:user_admin:org:admin"}
+
+
+async def fake_guard(request: Request):
+    token = request.headers["authorization"].split()[1]
+    org_id, user_id, role = token.split(":", 2)
+    return ClerkCredentials(scheme="Bearer", credentials=token,
+                            decoded={"sub": user_id, "org_id": org_id, "org_role": role})
+
+
+@pytest.fixture()
+def client():
+    app.dependency_overrides[clerk_guard] = fake_guard
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.pop(clerk_guard, None)
+
+
+def test_converted_reservation_keeps_its_window(client):
+    asset = client.post("/assets", json={"name": "Projector"}, headers=ADMIN).json()
+    reservation = client.post("/reservations", json={
+        "asset_id": asset["id"], "starts_at": "2020-01-01T00:00:00Z", "ends_at": "2031-01-05T00:00:00Z",
+    }, headers=ADMIN)
+    assert reservation.status_code == 201
+    converted = client.post(f"/reservations/{reservation.json()['id']}/convert", headers=ADMIN)
+    assert converted.status_code == 200
+
+    window = {"starts_at": "2030-01-02T00:00:00Z", "ends_at": "2030-01-03T00:00:00Z"}
+    clash = client.post("/reservations", json={"asset_id": asset["id"], **window}, headers=ADMIN)
+    assert clash.status_code == 409
+    available = client.get("/reservations/availability", params=window, headers=ADMIN).json()
+    assert asset["id"] not in available["asset_ids"]
+
+    # Free again once the asset is back.
+    client.post(f"/assignments/checkin/{converted.json()['id']}", json={}, headers=ADMIN)
+    later = client.post("/reservations", json={"asset_id": asset["id"], **window}, headers=ADMIN)
+    assert later.status_code == 201